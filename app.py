@@ -8,17 +8,36 @@ st.title("QuLab")
 st.divider()
 
 # Your code goes here
-page = st.sidebar.selectbox(label="Navigation", options=["Page 1", "Page 2", "Page 3"])
-
-if page == "Page 1":
-    from application_pages.page1 import run_page1
-    run_page1()
-elif page == "Page 2":
-    from application_pages.page2 import run_page2
-    run_page2()
-elif page == "Page 3":
-    from application_pages.page3 import run_page3
-    run_page3()
+# Pages are listed from the registry and only the selected one is imported.
+from application_pages.registry import PAGES, import_times, load_page
+from portfolio_engine import timing
+
+# Every rerun is timed by stage and logged as one JSON record.
+timing.enable_logging()
+
+page = st.sidebar.selectbox(label="Navigation", options=list(PAGES))
+show_timings = st.sidebar.toggle("Show performance", value=False)
+with timing.run(page) as rerun:
+    with timing.stage("import"):
+        run_page = load_page(page)
+    run_page()
+
+# Consecutive stages of every page; any other stage is timed inside one of them.
+PAGE_STAGES = ("import", "data", "optimize", "dataframe", "figure", "render")
+
+if show_timings:
+    with st.sidebar.expander("Performance of this rerun", expanded=True):
+        st.caption(f"{rerun.seconds:.3f} s in total. Page stages, then the engine calls and solves within them.")
+        page_stages = [stage for stage in PAGE_STAGES if stage in rerun.stages]
+        engine_stages = [stage for stage in rerun.stages if stage not in PAGE_STAGES]
+        for stage in page_stages + engine_stages:
+            calls, seconds = rerun.stages[stage]
+            st.text(f"{stage}: {1000 * seconds:.1f} ms" + (f" ({calls} calls)" if calls > 1 else ""))
+
+with st.sidebar.expander("Page import times"):
+    st.caption("Seconds spent importing each page module since the app started.")
+    for label, seconds in import_times.items():
+        st.text(f"{label.split(':')[0]}: {seconds:.3f} s")
 
 # Your code ends
 
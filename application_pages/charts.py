@@ -0,0 +1,112 @@
+"""Plotly figures for the application pages: compact payloads and a figure cache.
+
+Every figure is sent to the browser as JSON, so its size and the browser's
+drawing time grow with the number of points. :func:`compact_figure` rewrites
+the scatter and line traces of a finished figure so that large ones stay cheap
+without changing what is drawn:
+
+* coordinates are sent in single precision (seven significant digits, far
+  finer than a pixel), which halves the binary payload;
+* traces with more than :data:`GRID` points are thinned: a line keeps the
+  points where it enters a new cell of a grid of :data:`GRID` cells per axis,
+  finer than any chart is wide (and its end points); a marker cloud keeps one
+  point per cell of a pixel-scale grid of :data:`MARKER_GRID` cells per axis,
+  coarsened until at most :data:`MAX_MARKERS` points remain, since overlapping
+  markers a pixel apart draw the same picture;
+* traces still above :data:`GL_THRESHOLD` points are drawn with WebGL
+  (``Scattergl``) instead of SVG.
+
+:func:`cached_figure` keeps finished, compacted figures per key -- the
+dataset's fingerprint, the constraint values and any other input the figure
+shows -- so a rerun with unchanged inputs builds no DataFrame and no figure.
+Streamlit still serializes the cached figure on every rerun; that is the only
+form ``st.plotly_chart`` accepts.
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+from portfolio_engine.cache import LRUCache
+
+# Points per trace above which WebGL is used.
+GL_THRESHOLD = 1000
+# Thinning grid cells per axis for lines; traces with at most this many points are kept whole.
+GRID = 2000
+# Thinning grid cells per axis for marker clouds, about a pixel each.
+MARKER_GRID = 500
+# Most markers kept per trace; the marker grid is halved until the cloud fits.
+MAX_MARKERS = 5000
+# Finished figures kept, across pages and sessions.
+MAX_FIGURES = 64
+# Per-point trace and marker properties thinned along with the coordinates.
+PER_POINT = ("text", "hovertext", "customdata", "ids")
+PER_POINT_MARKER = ("size", "color", "symbol", "opacity")
+
+_figures = LRUCache(max_entries=MAX_FIGURES)
+
+
+def _cells(x, y, grid):
+    """Return the cell of every point on a ``grid`` x ``grid`` grid over the points' own range."""
+    index = []
+    for values in (x, y):
+        low, high = values.min(), values.max()
+        span = high - low if high > low else 1.0
+        index.append(np.minimum(((values - low) * (grid / span)).astype(np.int64), grid - 1))
+    return index[0] * grid + index[1]
+
+
+def thin(x, y, lines):
+    """Return the indices of the points of a line (``lines``) or marker cloud to draw."""
+    if not lines:
+        grid = MARKER_GRID
+        while True:
+            index = np.unique(_cells(x, y, grid), return_index=True)[1]
+            if len(index) <= MAX_MARKERS or grid == 1:
+                return np.sort(index)
+            grid //= 2
+    cells = _cells(x, y, GRID)
+    keep = np.ones(len(cells), dtype=bool)
+    keep[1:-1] = cells[1:-1] != cells[:-2]
+    return np.flatnonzero(keep)
+
+
+def compact(trace):
+    """Return ``trace`` thinned, in single precision and in WebGL when large; other traces unchanged."""
+    if trace.type not in ("scatter", "scattergl") or trace.x is None or trace.y is None:
+        return trace
+    props = trace.to_plotly_json()
+    x, y = np.asarray(props["x"]), np.asarray(props["y"])
+    if not (np.issubdtype(x.dtype, np.number) and np.issubdtype(y.dtype, np.number)):
+        return trace
+    n = len(x)
+    if n > GRID and np.isfinite(x).all() and np.isfinite(y).all():
+        # Plotly draws a scatter trace of more than 20 points without a mode as a line.
+        index = thin(x, y, lines="lines" in (props.get("mode") or "lines"))
+        x, y = x[index], y[index]
+        for name in PER_POINT:
+            if np.ndim(props.get(name)) == 1 and len(props[name]) == n:
+                props[name] = np.asarray(props[name])[index]
+        marker = props.get("marker") or {}
+        for name in PER_POINT_MARKER:
+            if np.ndim(marker.get(name)) == 1 and len(marker[name]) == n:
+                marker[name] = np.asarray(marker[name])[index]
+    props["x"], props["y"] = x.astype(np.float32), y.astype(np.float32)
+    del props["type"]
+    try:
+        return (go.Scattergl if len(x) > GL_THRESHOLD else go.Scatter)(**props)
+    except ValueError:
+        # A property WebGL traces do not support: keep the SVG trace.
+        return go.Scatter(**props)
+
+
+def compact_figure(fig):
+    """Return a copy of ``fig`` with every scatter and line trace compacted, see :func:`compact`."""
+    return go.Figure(data=[compact(trace) for trace in fig.data], layout=fig.layout)
+
+
+def cached_figure(key, build):
+    """Return the compacted figure ``build()`` for ``key``, building it only once.
+
+    ``key`` must identify everything the figure shows. Cached figures are
+    shared between reruns and sessions and must not be modified.
+    """
+    return _figures.get_or_create(key, lambda: compact_figure(build()))
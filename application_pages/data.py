@@ -0,0 +1,127 @@
+"""Dataset shared by the application pages.
+
+Every page works on the same moments: ``BlueChipStockMoments.mat`` when it is
+available (see :data:`DATA_FILE`), otherwise the synthetic stand-in the pages
+used to generate themselves. :func:`load_dataset` builds the :class:`Dataset`
+once per data source and keeps it in the engine's dataset cache
+(``st.cache_resource`` inside the app), apart from the solver states, so
+switching pages or rerunning one does no numerical setup. Derived quantities -- asset risks, the equal-weight
+portfolio, the covariance factorization -- are computed on first access and
+then kept with the dataset.
+"""
+import copy
+import os
+from functools import cached_property
+
+import numpy as np
+
+from portfolio_engine import Portfolio, cache, matfile, store
+from portfolio_engine.state import fingerprint
+
+# Moments file (MATLAB .mat or a portfolio_engine.store directory); QULAB_DATA overrides.
+DATA_FILE = os.environ.get(
+    "QULAB_DATA", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "BlueChipStockMoments.mat")
+)
+# Size and seed of the synthetic dataset used when DATA_FILE is missing.
+NUM_ASSETS = 30
+SEED = 42
+
+
+class Dataset:
+    """Asset moments with cash and market statistics, plus lazily derived quantities."""
+
+    def __init__(self, AssetList, AssetMean, AssetCovar, CashMean, CashVar, MarketMean, MarketVar):
+        self.AssetList = list(AssetList)
+        self.NumAssets = len(self.AssetList)
+        self.AssetMean = AssetMean
+        self.AssetCovar = AssetCovar
+        self.CashMean = CashMean
+        self.CashVar = CashVar
+        self.MarketMean = MarketMean
+        self.MarketVar = MarketVar
+
+    @cached_property
+    def key(self):
+        """Fingerprint of the moments and the cash and market statistics."""
+        scalars = np.array([self.CashMean, self.CashVar, self.MarketMean, self.MarketVar], dtype=float)
+        return fingerprint(self.AssetMean, self.AssetCovar, scalars)
+
+    @cached_property
+    def AssetRisk(self):
+        return np.sqrt(np.diag(self.AssetCovar))
+
+    @cached_property
+    def MarketRisk(self):
+        return np.sqrt(self.MarketVar)
+
+    @cached_property
+    def CashRisk(self):
+        return np.sqrt(self.CashVar)
+
+    @cached_property
+    def EqualWeight(self):
+        weights = np.ones(self.NumAssets) / self.NumAssets
+        weights.flags.writeable = False
+        return weights
+
+    @cached_property
+    def EqualMean(self):
+        return float(self.EqualWeight @ self.AssetMean)
+
+    @cached_property
+    def EqualRisk(self):
+        return float(np.sqrt(self.EqualWeight @ self.AssetCovar @ self.EqualWeight))
+
+    @cached_property
+    def _portfolio(self):
+        p = Portfolio(self.AssetList, self.CashMean)
+        p.setAssetMoments(self.AssetMean, self.AssetCovar)
+        return p
+
+    @cached_property
+    def factor(self):
+        """Covariance factorization shared with every portfolio of the dataset."""
+        return self._portfolio._state.factor
+
+    def portfolio(self):
+        """Return a new ``Portfolio`` with the dataset's moments and no constraints.
+
+        Portfolios share the moments and solver state of the dataset, so
+        creating one hashes and factorizes nothing.
+        """
+        return copy.copy(self._portfolio)
+
+
+def synthetic_dataset(NumAssets=NUM_ASSETS, seed=SEED):
+    """Return the synthetic stand-in for ``BlueChipStockMoments.mat``."""
+    rng = np.random.RandomState(seed)
+    AssetList = [f'Asset {i+1}' for i in range(NumAssets)]
+    AssetMean = rng.rand(NumAssets) * 0.2  # Annualized mean returns (e.g., 0 to 20%)
+    AssetCovar = rng.rand(NumAssets, NumAssets)
+    AssetCovar = np.triu(AssetCovar) + AssetCovar.T - np.diag(np.diag(AssetCovar))  # Make symmetric
+    AssetCovar = AssetCovar * 0.01  # Scale the covariance matrix
+    AssetMean.flags.writeable = AssetCovar.flags.writeable = False
+    return Dataset(AssetList, AssetMean, AssetCovar, CashMean=0.03, CashVar=0.0001, MarketMean=0.10, MarketVar=0.04)
+
+
+def stored_dataset(path):
+    """Return the dataset in a ``.mat`` file or store directory, memory-mapped from disk."""
+    if os.path.isdir(path):
+        stored = store.open_dataset(path)
+    else:
+        stored = matfile.load_moments(path)
+    return Dataset(
+        stored.AssetList, stored.AssetMean, stored.AssetCovar,
+        stored.scalars.get("CashMean", 0.0), stored.scalars.get("CashVar", 0.0),
+        stored.scalars.get("MarketMean", np.nan), stored.scalars.get("MarketVar", np.nan),
+    )
+
+
+def load_dataset(path=None):
+    """Return the shared :class:`Dataset` of ``path`` (default :data:`DATA_FILE`), built once."""
+    path = DATA_FILE if path is None else path
+    if not os.path.exists(path):
+        return cache.cached_dataset(("synthetic", NUM_ASSETS, SEED), synthetic_dataset)
+    info = os.stat(path)
+    key = (os.path.abspath(path), info.st_mtime_ns)
+    return cache.cached_dataset(key, lambda: stored_dataset(path))
@@ -0,0 +1,73 @@
+"""Registry of the application pages.
+
+``app.py`` lists every page from :data:`PAGES` without importing any of them;
+:func:`load_page` imports the selected page module on first use only. The
+heavy dependencies (pandas, plotly, the optimization engine and, on the first
+solve, cvxpy and scipy) are imported by the page modules, so the app's first
+paint costs only Streamlit itself.
+
+The seconds spent importing each page module in this process are kept in
+:data:`import_times` for the app to show. ``python -m application_pages.registry``
+reports the cold-start cost of every page, each imported on its own in a fresh
+interpreter.
+"""
+import importlib
+import os
+import subprocess
+import sys
+import time
+
+# Navigation label -> (module, entry point).
+PAGES = {
+    "Page 1: Efficient Frontier": ("application_pages.page1", "run_page1"),
+    "Page 2: Sharpe Ratio Maximization": ("application_pages.page2", "run_page2"),
+    "Page 3: Dollar-Neutral Hedge Fund": ("application_pages.page3", "run_page3"),
+    "Page 4: Range of Risks and Returns": ("application_pages.page4", "run_page4"),
+    "Page 5: Targeted Portfolios": ("application_pages.page5", "run_page5"),
+    "Page 6: Transaction Costs": ("application_pages.page6", "run_page6"),
+    "Page 7: Turnover Constraint": ("application_pages.page7", "run_page7"),
+    "Page 8: Tracking-Error Constraint": ("application_pages.page8", "run_page8"),
+    "Page 9: Turnover and Tracking-Error Constraints": ("application_pages.page9", "run_page9"),
+    "Page 10: Maximum Sharpe Ratio Portfolio": ("application_pages.page10", "run_page10"),
+    "Page 11: Maximum Sharpe Ratio is a Maximum": ("application_pages.page11", "run_page11"),
+    "Page 12: Sharpe is the Tangent Portfolio": ("application_pages.page12", "run_page12"),
+    "Page 13: Dollar-Neutral Hedge-Fund Structure": ("application_pages.page13", "run_page13"),
+}
+
+# Seconds spent importing each page module in this process, by label. Modules
+# shared with pages imported earlier are already loaded and cost nothing here.
+import_times = {}
+
+
+def load_page(label):
+    """Return the entry point of the page ``label``, importing its module on first use."""
+    module_name, function = PAGES[label]
+    module = sys.modules.get(module_name)
+    if module is None:
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        import_times[label] = time.perf_counter() - start
+    return getattr(module, function)
+
+
+def cold_import_time(module_name):
+    """Return the seconds a fresh interpreter takes to import ``module_name`` once Streamlit is loaded."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = (
+        "import importlib, time, streamlit\n"
+        "start = time.perf_counter()\n"
+        f"importlib.import_module({module_name!r})\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    return float(out.stdout.split()[-1])
+
+
+def main():
+    width = max(len(label) for label in PAGES)
+    for label, (module_name, _) in PAGES.items():
+        print(f"{label:<{width}}  {cold_import_time(module_name):6.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Benchmarks of the portfolio engine (airspeed velocity suite, see ``asv.conf.json``)."""
@@ -0,0 +1,40 @@
+"""Size of the figures the application pages send, see :mod:`application_pages.charts`.
+
+* ``time_compact``: compacting a figure with one trace of ``points`` points.
+* ``track_points``: points left in the trace; fails if a marker cloud keeps
+  more than :data:`application_pages.charts.MAX_MARKERS`.
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+from application_pages import charts
+from benchmarks import common
+
+
+class CompactFigure:
+    """``compact_figure`` on a random-portfolio marker cloud and on a line."""
+
+    params = ([1000, 50000], ["markers", "lines"])
+    param_names = ["points", "mode"]
+
+    def setup(self, points, mode):
+        rng = np.random.RandomState(common.SEED)
+        if mode == "markers":
+            # Risks and returns of random portfolios: a dense, correlated cloud.
+            risk = rng.gamma(4.0, 0.01, points)
+            x, y = risk, 0.5 * risk + rng.normal(0.0, 0.005, points)
+        else:
+            x = np.linspace(0.0, 1.0, points)
+            y = np.sin(30 * x)
+        self.fig = go.Figure(go.Scatter(x=x, y=y, mode=mode))
+
+    def time_compact(self, points, mode):
+        charts.compact_figure(self.fig)
+
+    def track_points(self, points, mode):
+        kept = len(charts.compact_figure(self.fig).data[0].x)
+        if mode == "markers" and kept > min(points, charts.MAX_MARKERS):
+            raise AssertionError(f"{kept} of {points} markers kept, more than {charts.MAX_MARKERS}")
+        return kept
+
+    track_points.unit = "points"
@@ -0,0 +1,136 @@
+"""Timing, memory and accuracy of the engine's estimators.
+
+Every estimator is benchmarked for each universe size and constraint mix of
+:mod:`benchmarks.common`:
+
+* ``time_solve``: a solve with the factorization and compiled problems of the
+  moments cached, i.e. what a page rerun with new constraint values costs.
+* ``time_cold``: a solve from empty caches, including fingerprinting,
+  factorization and problem compilation.
+* ``track_compile``: the difference of the two, in seconds.
+* ``track_point_time``: ``time_solve`` per frontier portfolio, in seconds.
+* ``peakmem_cold``: peak memory of the process around a cold solve.
+* ``track_violation`` and the ``*_gap`` trackers: accuracy of the solution,
+  see :func:`benchmarks.common.violation` and :func:`benchmarks.common.risk_gap`.
+  They fail beyond :data:`benchmarks.common.TOLERANCES`.
+"""
+import abc
+import time
+
+import numpy as np
+
+from benchmarks import common
+
+
+class _Estimator(abc.ABC):
+    params = (common.SIZES, list(common.MIXES))
+    param_names = ["n", "mix"]
+    number = 1
+    repeat = (1, 5, 20.0)
+    timeout = 1800
+
+    @abc.abstractmethod
+    def estimate(self, p):
+        """Return the weights the benchmarked estimator finds for ``p``."""
+
+    def setup(self, n, mix):
+        self.p = common.portfolio(n, mix)
+        # The first solve compiles the problems the timed solves reuse.
+        self.weights = self.estimate(self.p)
+
+    def time_solve(self, n, mix):
+        common.drop_results(self.p)
+        self.estimate(self.p)
+
+    def time_cold(self, n, mix):
+        self.estimate(common.portfolio(n, mix, cold=True))
+
+    def peakmem_cold(self, n, mix):
+        self.estimate(common.portfolio(n, mix, cold=True))
+
+    def track_compile(self, n, mix):
+        start = time.perf_counter()
+        self.estimate(common.portfolio(n, mix, cold=True))
+        cold = time.perf_counter() - start
+        common.drop_results(self.p)
+        start = time.perf_counter()
+        self.estimate(self.p)
+        return max(cold - (time.perf_counter() - start), 0.0)
+
+    track_compile.unit = "seconds"
+
+    def track_violation(self, n, mix):
+        return common.checked(common.violation(self.p, self.weights), "violation")
+
+    track_violation.unit = "weight"
+
+
+class Frontier(_Estimator):
+    """``estimateFrontier`` with the pages' number of portfolios."""
+
+    def estimate(self, p):
+        return p.estimateFrontier(common.NUM_PORTS)
+
+    def track_point_time(self, n, mix):
+        common.drop_results(self.p)
+        start = time.perf_counter()
+        self.estimate(self.p)
+        return (time.perf_counter() - start) / common.NUM_PORTS
+
+    track_point_time.unit = "seconds"
+
+    def track_risk_gap(self, n, mix):
+        return common.checked(common.risk_gap(self.p, self.weights), "risk")
+
+    track_risk_gap.unit = "relative"
+
+
+class FrontierLimits(_Estimator):
+    """``estimateFrontierLimits``: the minimum-risk and maximum-return portfolios."""
+
+    def estimate(self, p):
+        return p.estimateFrontierLimits()
+
+    def track_risk_gap(self, n, mix):
+        return common.checked(common.risk_gap(self.p, self.weights), "risk")
+
+    track_risk_gap.unit = "relative"
+
+    def track_return_gap(self, n, mix):
+        problem = common.reference_problem(self.p)
+        best = self.p.estimatePortMoments(common.reference_solve(problem, problem.max_return))[1]
+        return common.checked(best - self.p.estimatePortMoments(self.weights[1])[1], "return")
+
+    track_return_gap.unit = "return"
+
+
+class MaxSharpeRatio(_Estimator):
+    """``estimateMaxSharpeRatio``."""
+
+    def estimate(self, p):
+        return p.estimateMaxSharpeRatio()
+
+    def track_sharpe_gap(self, n, mix):
+        """Shortfall of the Sharpe ratio from the highest on the reference frontier, relative to it."""
+        best = common.reference_max_sharpe(self.p)
+        return common.checked((best - common.sharpe_ratio(self.p, self.weights)) / abs(best), "sharpe")
+
+    track_sharpe_gap.unit = "relative"
+
+
+class PortMoments:
+    """``estimatePortMoments`` for a block of portfolios, net of transaction costs."""
+
+    params = (common.SIZES, [common.NUM_PORTS, 1000])
+    param_names = ["n", "portfolios"]
+
+    def setup(self, n, portfolios):
+        self.p = common.portfolio(n, "costs")
+        self.p._state.factor
+        self.weights = np.random.RandomState(common.SEED).dirichlet(np.ones(n), portfolios)
+
+    def time_estimatePortMoments(self, n, portfolios):
+        self.p.estimatePortMoments(self.weights)
+
+    def peakmem_estimatePortMoments(self, n, portfolios):
+        self.p.estimatePortMoments(self.weights)
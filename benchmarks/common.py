@@ -0,0 +1,240 @@
+"""Universes, constraint mixes and reference solutions shared by the benchmarks.
+
+Universes are generated from fixed seeds, so every run and every commit
+benchmarks the same problems:
+
+* ``n = 30`` is the synthetic stand-in for ``BlueChipStockMoments.mat`` the
+  application pages use (a dense covariance that needs repairing).
+* Larger universes come from a ``k``-factor model in monthly units. Up to
+  :data:`DENSE_MAX_ASSETS` assets its covariance is formed and passed densely;
+  beyond that it is passed in factored form, as a universe that size would be.
+
+The constraint mixes are those of application pages 4-13, written as settings
+for :func:`portfolio_engine.batch.configure` and applied after the default
+constraints, as on the pages.
+
+Accuracy is measured against the same constraint set solved independently of
+the engine's caches and shortcuts (critical line, screening, rescaling): a
+fresh compiled problem solved with the interior-point solver at tight
+tolerances. Constraint violations are computed directly from the weights.
+Accuracy trackers fail when a gap or violation exceeds its entry in
+:data:`TOLERANCES`, so a regression shows up as a failed benchmark rather than
+as a number nobody reads.
+"""
+import numpy as np
+
+from portfolio_engine import Portfolio, cache
+from portfolio_engine.batch import configure
+from portfolio_engine.constraints import structure, tracking_port, turnover
+from portfolio_engine.frontier import FrontierProblem
+from portfolio_engine.risk import port_risk
+
+SIZES = [30, 500, 2000, 5000]
+# Largest universe given to the engine as a dense covariance.
+DENSE_MAX_ASSETS = 500
+NUM_FACTORS = 10
+SEED = 42
+# Frontier portfolios per solve, as on the pages.
+NUM_PORTS = 20
+
+# Assets in the tracking portfolio of pages 8 and 9, repeated every 30 assets
+# (``"tracked"`` in the mixes below).
+TRACKED = (14, 15, 19, 20, 22, 24, 26, 28, 29)
+
+# Constraint mix -> settings applied after the default constraints (pages 4-13).
+MIXES = {
+    "default": {"InitPort": "equal"},  # pages 4, 5
+    "costs": {"InitPort": "equal", "Costs": [0.002, 0.002]},  # page 6
+    "turnover": {"InitPort": "equal", "Turnover": 0.2},  # page 7
+    "tracking": {"InitPort": "equal", "TrackingError": [0.05 / np.sqrt(12), "tracked"]},  # page 8
+    "combined": {  # page 9
+        "InitPort": "equal", "TrackingError": [0.05 / np.sqrt(12), "tracked"], "Turnover": 0.3,
+    },
+    "cash-budget": {"InitPort": "zero", "Budget": [0, 1]},  # pages 10-12
+    "dollar-neutral": {  # page 13
+        "InitPort": "zero", "Bounds": [-1, 1], "Budget": [0, 0], "OnewayTurnover": [1, 1],
+    },
+}
+
+# Interior-point settings of the reference solutions.
+REFERENCE_SOLVER = "CLARABEL"
+REFERENCE_OPTIONS = {"tol_gap_abs": 1e-9, "tol_gap_rel": 1e-9, "tol_feas": 1e-9, "max_iter": 500}
+# Golden-section steps of the reference maximum Sharpe ratio search.
+SHARPE_SEARCH_STEPS = 30
+# Largest accepted shortfall from the reference (relative risk and Sharpe
+# ratio gaps, absolute return gap) and constraint violation (in weight).
+TOLERANCES = {"risk": 1e-3, "return": 1e-6, "sharpe": 1e-3, "violation": 1e-5}
+
+_universes = {}
+
+
+def factor_model(n, k=NUM_FACTORS, seed=SEED):
+    """Return ``(AssetMean, FactorLoadings, FactorCovar, SpecificVar)`` of a monthly factor model."""
+    rng = np.random.RandomState(seed)
+    loadings = rng.normal(0.0, 0.5, (n, k))
+    loadings[:, 0] = rng.normal(1.0, 0.3, n)  # market betas
+    factor_risk = np.r_[0.045, np.full(k - 1, 0.02)]
+    corr = 0.2 * np.ones((k, k)) + 0.8 * np.eye(k)
+    FactorCovar = corr * np.outer(factor_risk, factor_risk)
+    SpecificVar = rng.uniform(0.04, 0.10, n) ** 2
+    premia = np.r_[0.006, rng.normal(0.0, 0.002, k - 1)]
+    AssetMean = 0.002 + loadings @ premia + rng.normal(0.0, 0.002, n)
+    return AssetMean, loadings, FactorCovar, SpecificVar
+
+
+def universe(n):
+    """Return ``(AssetList, RiskFreeRate, moments)`` for ``n`` assets, with ``moments`` for ``setAssetMoments``."""
+    if n not in _universes:
+        if n == 30:
+            from application_pages.data import synthetic_dataset
+
+            data = synthetic_dataset()
+            moments = {"AssetMean": data.AssetMean, "AssetCovar": data.AssetCovar}
+            _universes[n] = (data.AssetList, data.CashMean, moments)
+        else:
+            AssetMean, B, F, D = factor_model(n)
+            if n <= DENSE_MAX_ASSETS:
+                moments = {"AssetMean": AssetMean, "AssetCovar": B @ F @ B.T + np.diag(D)}
+            else:
+                moments = {"AssetMean": AssetMean, "FactorLoadings": B, "FactorCovar": F, "SpecificVar": D}
+            _universes[n] = ([f"Asset {i + 1}" for i in range(n)], 0.0025, moments)
+    return _universes[n]
+
+
+def portfolio(n, mix, cold=False):
+    """Return a ``Portfolio`` of ``n`` assets with the constraint mix ``mix``.
+
+    With ``cold`` every cached solver state and result is dropped first, so
+    the portfolio's first solve factorizes and compiles from scratch.
+    """
+    if cold:
+        cache.clear()
+    AssetList, RiskFreeRate, moments = universe(n)
+    p = Portfolio(AssetList, RiskFreeRate)
+    p.setAssetMoments(**moments)
+    p.setDefaultConstraints()
+    settings = dict(MIXES[mix])
+    if "TrackingError" in settings:
+        TrackingPort = {"indices": [i for i in range(n) if i % 30 in TRACKED]}
+        settings["TrackingError"] = [settings["TrackingError"][0], TrackingPort]
+    return configure(p, settings)
+
+
+def drop_results(p):
+    """Drop the solved results of ``p`` but keep its factorization and compiled problems."""
+    cache.clear_results()
+    p._state.solutions.clear()
+
+
+def violation(p, weights):
+    """Return the largest violation of any constraint of ``p`` by the rows of ``weights``."""
+    w = np.atleast_2d(weights)
+    excess = [np.zeros(len(w))]
+    if p.LowerBound is not None:
+        excess.append(np.max(p.LowerBound - w, axis=1))
+    if p.UpperBound is not None:
+        excess.append(np.max(w - p.UpperBound, axis=1))
+    if p.LowerBudget is not None:
+        excess += [p.LowerBudget - w.sum(axis=1), w.sum(axis=1) - p.UpperBudget]
+    trades = w - (0.0 if p.InitPort is None else p.InitPort)
+    if p.Turnover is not None:
+        excess.append(turnover(p, w) - p.Turnover)
+    if p.BuyTurnover is not None:
+        excess.append(np.maximum(trades, 0).sum(axis=1) - p.BuyTurnover)
+    if p.SellTurnover is not None:
+        excess.append(np.maximum(-trades, 0).sum(axis=1) - p.SellTurnover)
+    if p.GrossExposure is not None:
+        excess.append(np.abs(w).sum(axis=1) - p.GrossExposure)
+    if p.TrackingError is not None:
+        excess.append(port_risk(w - tracking_port(p), p._state.factor) - p.TrackingError)
+    return float(np.max(excess, initial=0.0))
+
+
+def checked(value, kind):
+    """Return ``value``, raising ``AssertionError`` if it exceeds the tolerance for ``kind``."""
+    tolerance = TOLERANCES[kind]
+    if not value <= tolerance:
+        raise AssertionError(f"{value:.3g} exceeds the {kind} tolerance of {tolerance:.3g}")
+    return value
+
+
+def reference_problem(p):
+    """Return a newly compiled :class:`~portfolio_engine.frontier.FrontierProblem` for ``p``."""
+    problem = FrontierProblem(p._state, structure(p))
+    problem.constraints.load(p)
+    return problem
+
+
+def reference_solve(problem, objective):
+    """Solve ``objective`` of a reference problem at tight tolerances and return the weights."""
+    import cvxpy as cp
+
+    try:
+        objective.solve(solver=REFERENCE_SOLVER, **REFERENCE_OPTIONS)
+    except cp.SolverError:
+        # Tolerances out of reach for this problem: use the solver's own.
+        try:
+            objective.solve(solver=REFERENCE_SOLVER)
+        except cp.SolverError as error:
+            raise RuntimeError(f"Reference solve failed: {error}") from None
+    if objective.status not in (cp.OPTIMAL, cp.OPTIMAL_INACCURATE):
+        raise RuntimeError(f"Reference solve failed with status '{objective.status}'.")
+    return np.array(problem.weights.value)
+
+
+def risk_gap(p, weights):
+    """Return the largest excess risk of ``weights`` over the reference portfolios at the same returns.
+
+    The gap is relative to the largest risk among ``weights``, since the
+    minimum risk may be zero (a dollar-neutral book can hold nothing).
+    """
+    risks, returns = p.estimatePortMoments(np.atleast_2d(weights))
+    problem = reference_problem(p)
+    # At the maximum return the target-return problem has no interior, so the
+    # top of the frontier is left to the return gap instead.
+    highest = p.estimatePortMoments(reference_solve(problem, problem.max_return))[1]
+    highest -= 1e-6 * (highest - returns.min())
+    gaps = []
+    for risk, target in zip(risks, returns):
+        if target >= highest:
+            continue
+        problem.target.value = target
+        gaps.append(risk - p.estimatePortMoments(reference_solve(problem, problem.target_return))[0])
+    return float(max(gaps) / risks.max())
+
+
+def sharpe_ratio(p, weights):
+    """Return the Sharpe ratio of ``weights``: return in excess of cash at ``RiskFreeRate`` per unit risk.
+
+    The cash rate applies to the invested budget, so a dollar-neutral book has
+    no cash cost, as in the engine's maximum Sharpe ratio problem. Under a
+    budget range the return already includes the uninvested cash.
+    """
+    risk, ret = p.estimatePortMoments(weights)
+    invested = 1.0 if p.LowerBudget != p.UpperBudget else np.sum(weights)
+    return (ret - p.RiskFreeRate * invested) / risk
+
+
+def reference_max_sharpe(p):
+    """Return the highest Sharpe ratio on the reference frontier, by golden-section search in return."""
+    problem = reference_problem(p)
+    low = p.estimatePortMoments(reference_solve(problem, problem.min_risk))[1]
+    high = p.estimatePortMoments(reference_solve(problem, problem.max_return))[1]
+
+    def sharpe(target):
+        problem.target.value = target
+        return sharpe_ratio(p, reference_solve(problem, problem.target_return))
+
+    ratio = (np.sqrt(5) - 1) / 2
+    a, b = low + (1 - ratio) * (high - low), low + ratio * (high - low)
+    fa, fb = sharpe(a), sharpe(b)
+    for _ in range(SHARPE_SEARCH_STEPS):
+        if fa >= fb:
+            high, b, fb = b, a, fa
+            a = low + (1 - ratio) * (high - low)
+            fa = sharpe(a)
+        else:
+            low, a, fa = a, b, fb
+            b = low + ratio * (high - low)
+            fb = sharpe(b)
+    return float(max(fa, fb))
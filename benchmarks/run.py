@@ -0,0 +1,83 @@
+"""Run the benchmark suite in this process, without asv.
+
+Usage::
+
+    python -m benchmarks.run [--sizes N ...] [--mixes MIX ...] [--only NAME ...] [--repeat R]
+
+Prints one line per benchmark and parameter combination. Times are the best of
+``--repeat`` runs. ``peakmem_*`` benchmarks report the peak traced Python and
+NumPy allocations, which leaves out memory allocated inside the solvers (asv
+reports the peak resident size of the process instead).
+"""
+import argparse
+import itertools
+import time
+import tracemalloc
+
+from benchmarks import bench_charts, bench_engine
+
+BENCHMARKS = [
+    bench_engine.Frontier, bench_engine.FrontierLimits, bench_engine.MaxSharpeRatio, bench_engine.PortMoments,
+    bench_charts.CompactFigure,
+]
+PREFIXES = ("time_", "peakmem_", "track_")
+
+
+def measure(method, params, repeat):
+    """Return ``(value, unit)`` of one benchmark method."""
+    if method.__name__.startswith("time_"):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            method(*params)
+            best = min(best, time.perf_counter() - start)
+        return best, "seconds"
+    if method.__name__.startswith("peakmem_"):
+        tracemalloc.start()
+        try:
+            method(*params)
+            return tracemalloc.get_traced_memory()[1] / 2**20, "MiB"
+        finally:
+            tracemalloc.stop()
+    return method(*params), getattr(method, "unit", "")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", help="universe sizes (default: all)")
+    parser.add_argument("--mixes", nargs="+", help="constraint mixes (default: all)")
+    parser.add_argument("--only", nargs="+", help="benchmark classes or methods to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    for benchmark in BENCHMARKS:
+        names = [name for name in dir(benchmark) if name.startswith(PREFIXES)]
+        if args.only:
+            names = [
+                name for name in names if benchmark.__name__ in args.only or f"{benchmark.__name__}.{name}" in args.only
+            ]
+        if not names:
+            continue
+        grid = dict(zip(benchmark.param_names, benchmark.params))
+        if args.sizes and "n" in grid:
+            grid["n"] = [n for n in grid["n"] if n in args.sizes]
+        if args.mixes and "mix" in grid:
+            grid["mix"] = [mix for mix in grid["mix"] if mix in args.mixes]
+        for params in itertools.product(*grid.values()):
+            label = ", ".join(f"{name}={value}" for name, value in zip(grid, params))
+            instance = benchmark()
+            try:
+                instance.setup(*params)
+            except (ValueError, RuntimeError) as error:
+                print(f"{benchmark.__name__} ({label}): setup failed: {error}", flush=True)
+                continue
+            for name in names:
+                try:
+                    value, unit = measure(getattr(instance, name), params, args.repeat)
+                    print(f"{benchmark.__name__}.{name} ({label}): {value:.6g} {unit}", flush=True)
+                except (ValueError, RuntimeError, AssertionError) as error:
+                    print(f"{benchmark.__name__}.{name} ({label}): failed: {error}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""Portfolio optimization engine shared by the QuLab pages."""
+from portfolio_engine.batch import estimateBatchFrontiers
+from portfolio_engine.moments import MomentEstimator
+from portfolio_engine.portfolio import (
+    Portfolio,
+    estimateAssetMoments,
+    estimateFrontier,
+    estimateFrontierByReturn,
+    estimateFrontierByRisk,
+    estimateFrontierLimits,
+    estimateMaxSharpeRatio,
+    estimatePortMoments,
+)
+
+__all__ = [
+    "MomentEstimator",
+    "Portfolio",
+    "estimateAssetMoments",
+    "estimateBatchFrontiers",
+    "estimateFrontier",
+    "estimateFrontierByReturn",
+    "estimateFrontierByRisk",
+    "estimateFrontierLimits",
+    "estimateMaxSharpeRatio",
+    "estimatePortMoments",
+]
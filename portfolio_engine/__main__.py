@@ -0,0 +1,6 @@
+"""Entry point for ``python -m portfolio_engine``; see :mod:`portfolio_engine.cli`."""
+import sys
+
+from portfolio_engine.cli import main
+
+sys.exit(main())
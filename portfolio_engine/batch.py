@@ -0,0 +1,212 @@
+"""Frontiers for many accounts sharing one set of moments, across a process pool.
+
+An account is an initial portfolio; each account is solved under one or more
+constraint *variants* (turnover limits, tracking-error limits, ...), given as
+dictionaries of ``Portfolio`` setter arguments (see :func:`configure`).
+
+The moments and their factorization are the large part of every task, and
+they are the same for all of them. They are therefore placed once in
+:mod:`multiprocessing.shared_memory` blocks that every worker maps read-only,
+instead of being pickled into each task. Each worker builds its solver state
+around the shared arrays once, compiles each constraint structure once, and
+then re-solves the compiled problems with new parameter values for every
+account, so tasks are small (one ``InitPort``) and independent and throughput
+grows with the number of workers.
+"""
+import copy
+import multiprocessing
+import os
+import warnings
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from portfolio_engine.state import FactorModelState, SolverState
+
+# Portfolio arguments of setters that may be given by name.
+PORTFOLIO_ARGUMENTS = {"InitPort": 0, "TrackingError": 1}
+
+# Per-worker template portfolio around the shared moments, and the shared
+# memory blocks it maps (kept referenced so the maps stay valid).
+_template = None
+_blocks = []
+
+
+def _portfolio_argument(value, NumAssets):
+    """Resolve ``"equal"``, ``"zero"`` and ``{"indices": [...]}`` to weights."""
+    if isinstance(value, str) and value == "equal":
+        return np.ones(NumAssets) / NumAssets
+    if isinstance(value, str) and value == "zero":
+        return np.zeros(NumAssets)
+    if isinstance(value, dict):
+        weights = np.zeros(NumAssets)
+        weights[value["indices"]] = 1.0 / len(value["indices"])
+        return weights
+    return value
+
+
+def configure(p, variant):
+    """Apply the constraint settings ``variant`` to ``p`` in order and return ``p``.
+
+    Keys are ``Portfolio`` setter names without the ``set`` prefix. A scalar
+    value is passed as the only argument and a list as the positional
+    arguments (so a per-asset vector is ``[[...]]``). ``"DefaultConstraints":
+    true`` calls ``setDefaultConstraints()`` and ``"RiskFreeRate"`` sets the
+    rate; a ``"name"`` key is ignored.
+    """
+    for name, value in variant.items():
+        if name == "name":
+            continue
+        if name == "RiskFreeRate":
+            p.RiskFreeRate = float(value)
+            continue
+        if name == "DefaultConstraints":
+            if value:
+                p.setDefaultConstraints()
+            continue
+        setter = getattr(p, f"set{name}", None)
+        if setter is None:
+            raise ValueError(f"Unknown constraint setting {name!r}.")
+        args = list(value) if isinstance(value, list) else [value]
+        position = PORTFOLIO_ARGUMENTS.get(name)
+        if position is not None and position < len(args):
+            args[position] = _portfolio_argument(args[position], p.NumAssets)
+        setter(*args)
+    return p
+
+
+def _share(arrays):
+    """Copy ``arrays`` into new shared memory blocks; return the blocks and their descriptors."""
+    blocks, descriptors = [], {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array, dtype=float)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        descriptors[name] = (block.name, array.shape)
+    return blocks, descriptors
+
+
+def _attach(descriptors):
+    """Map shared blocks as read-only arrays, by name."""
+    arrays = {}
+    for name, (block_name, shape) in descriptors.items():
+        # Workers share the parent's resource tracker, so the parent's unlink
+        # also retires the workers' registrations of the block.
+        block = shared_memory.SharedMemory(block_name)
+        _blocks.append(block)
+        array = np.ndarray(shape, float, buffer=block.buf)
+        array.flags.writeable = False
+        arrays[name] = array
+    return arrays
+
+
+def _shared_arrays(p):
+    """Return the moment arrays and factorization of ``p`` to place in shared memory."""
+    state = p._state
+    if state.factored:
+        return {
+            "FactorLoadings": p.FactorLoadings,
+            "FactorCovar": p.FactorCovar,
+            "SpecificVar": state.SpecificVar,
+            "loadings": state.loadings,
+        }
+    arrays = {"AssetCovar": p.AssetCovar, "factor": state.factor}
+    if state.validate():
+        arrays["covariance"] = state.covariance
+    return arrays
+
+
+def _initialize(template, key, descriptors):
+    """Worker initializer: rebuild the template portfolio around the shared arrays."""
+    global _template
+    arrays = _attach(descriptors)
+    if "factor" in arrays:
+        state = SolverState(template.AssetMean, arrays["AssetCovar"], key)
+        state._factor, state._covariance = arrays["factor"], arrays.get("covariance")
+        state.repaired = state._covariance is not None
+        template.AssetCovar = arrays["AssetCovar"]
+    else:
+        state = FactorModelState(
+            template.AssetMean, arrays["FactorLoadings"], arrays["FactorCovar"], arrays["SpecificVar"], key
+        )
+        state._loadings = arrays["loadings"]
+        template.FactorLoadings, template.FactorCovar = arrays["FactorLoadings"], arrays["FactorCovar"]
+        template.SpecificVar = arrays["SpecificVar"]
+    template._state = state
+    _template = template
+
+
+def _solve_account(task):
+    """Solve every variant for one account; failed variants are left as NaN."""
+    account, InitPort, variants, NumPorts = task
+    weights = np.full((len(variants), NumPorts, _template.NumAssets), np.nan)
+    errors = []
+    for k, variant in enumerate(variants):
+        q = copy.copy(_template)
+        q.setInitPort(InitPort)
+        try:
+            weights[k] = configure(q, variant).estimateFrontier(NumPorts)
+        except (ValueError, RuntimeError) as error:
+            errors.append((account, k, str(error)))
+    return account, weights, errors
+
+
+def estimateBatchFrontiers(p, InitPorts, Variants=None, NumPorts=10, Processes=None):
+    """Return the frontiers of many accounts under each constraint variant.
+
+    ``InitPorts`` holds one initial portfolio per row (one row per account).
+    Each account starts from the constraints of ``p``, takes its own
+    ``InitPort`` and then the settings of each dictionary in ``Variants``
+    (default: ``p``'s constraints alone), see :func:`configure`. Returns an
+    array of shape ``(accounts, variants, NumPorts, NumAssets)``; frontiers
+    that could not be solved are NaN and reported in one warning.
+
+    ``Processes`` defaults to the number of CPUs; with one process (or one
+    account) everything runs in the calling process.
+    """
+    InitPorts = np.atleast_2d(np.asarray(InitPorts, dtype=float))
+    variants = [dict(variant) for variant in (Variants or [{}])]
+    Processes = Processes or os.cpu_count() or 1
+    Processes = min(Processes, len(InitPorts))
+    tasks = [(account, InitPort, variants, NumPorts) for account, InitPort in enumerate(InitPorts)]
+    weights = np.empty((len(InitPorts), len(variants), NumPorts, p.NumAssets))
+    errors = []
+
+    if Processes <= 1:
+        global _template
+        saved, _template = _template, p
+        try:
+            results = map(_solve_account, tasks)
+            for account, account_weights, account_errors in results:
+                weights[account] = account_weights
+                errors += account_errors
+        finally:
+            _template = saved
+    else:
+        template = copy.copy(p)
+        template._state = None
+        template.AssetCovar = template.FactorLoadings = template.FactorCovar = template.SpecificVar = None
+        blocks, descriptors = _share(_shared_arrays(p))
+        try:
+            with multiprocessing.get_context().Pool(
+                Processes, initializer=_initialize, initargs=(template, p._state.key, descriptors)
+            ) as pool:
+                chunksize = max(1, len(tasks) // (4 * Processes))
+                for account, account_weights, account_errors in pool.imap_unordered(
+                    _solve_account, tasks, chunksize
+                ):
+                    weights[account] = account_weights
+                    errors += account_errors
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    if errors:
+        account, variant, message = errors[0]
+        warnings.warn(
+            f"{len(errors)} of {weights.shape[0] * weights.shape[1]} frontiers could not be solved "
+            f"(first: account {account}, variant {variant}: {message})."
+        )
+    return weights
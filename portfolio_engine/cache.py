@@ -0,0 +1,191 @@
+"""Bounded caches for datasets, solver states and solved results.
+
+Two kinds of objects are cached, both keyed on fingerprints rather than on the
+arrays themselves:
+
+* solver states (covariance factor plus compiled optimization problems), keyed
+  on the moments. These hold live solver workspaces and are shared, never
+  copied.
+* solved results such as frontiers, keyed on the moments, the constraint values
+  and the call arguments. These are plain arrays.
+
+Datasets loaded by an application (see :func:`cached_dataset`) are kept in a
+small cache of their own, so that neither evicts the other.
+
+Inside a running Streamlit app these map onto ``st.cache_resource`` and
+``st.cache_data``, so they are shared across sessions and cleared with the rest
+of the app's caches. Anywhere else (scripts, the command line) an in-process LRU
+is used instead and Streamlit is never imported. Both variants evict the least
+recently used entries beyond a fixed count; the in-process result cache, and
+the per-state cache of intermediate results, are also bounded in memory.
+
+Streamlit serves each session from its own thread, so the caches take a lock
+on every access, and a solver state carries a lock of its own for its compiled
+problems (see :class:`portfolio_engine.state.SolverState`).
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Datasets kept loaded at once (one per data source and version).
+MAX_DATASETS = 4
+# Solver states kept alive at once (one per distinct set of moments).
+MAX_STATES = 8
+# Solved results kept across all states, by count and by total array size.
+MAX_RESULTS = 256
+MAX_RESULT_BYTES = 256 << 20
+# Intermediate results (corners, limits, indexes) kept per solver state.
+MAX_SOLUTION_BYTES = 64 << 20
+
+
+def nbytes(value):
+    """Return the approximate memory held by ``value``, counting array buffers."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(nbytes(item) for item in value)
+    return getattr(value, "nbytes", None) or sys.getsizeof(value)
+
+
+class LRUCache:
+    """Thread-safe mapping that evicts least recently used entries beyond a count or byte size."""
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def get_or_create(self, key, factory):
+        """Return the value under ``key``, storing ``factory()`` first if there is none."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+        value = factory()
+        with self._lock:
+            if key in self._entries:
+                # Another thread stored one meanwhile: use it, so all share it.
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+            self._store(key, value)
+        return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key, value):
+        if key in self._entries:
+            self.size -= self._entries.pop(key)[1]
+        size = 0 if self.max_bytes is None else nbytes(value)
+        self._entries[key] = (value, size)
+        self.size += size
+        while len(self._entries) > 1 and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self.size > self.max_bytes)
+        ):
+            self.size -= self._entries.popitem(last=False)[1][1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+_datasets = LRUCache(max_entries=MAX_DATASETS)
+_states = LRUCache(max_entries=MAX_STATES)
+_results = LRUCache(max_entries=MAX_RESULTS, max_bytes=MAX_RESULT_BYTES)
+_streamlit_caches = {}
+
+
+def _streamlit():
+    """Return the ``streamlit`` module when running inside a Streamlit app, else ``None``."""
+    st = sys.modules.get("streamlit")
+    if st is None:
+        return None
+    from streamlit import runtime
+
+    return st if runtime.exists() else None
+
+
+def _streamlit_cache(st, kind):
+    # Decorated once per process; Streamlit only hashes the key, not the factory.
+    cached = _streamlit_caches.get(kind)
+    if cached is None:
+        if kind == "dataset":
+            @st.cache_resource(max_entries=MAX_DATASETS, show_spinner=False)
+            def cached_dataset(key, _factory):
+                return _factory()
+
+            cached = cached_dataset
+        elif kind == "resource":
+            @st.cache_resource(max_entries=MAX_STATES, show_spinner=False)
+            def cached(key, _factory):
+                return _factory()
+        else:
+            @st.cache_data(max_entries=MAX_RESULTS, show_spinner=False)
+            def cached(key, _factory):
+                return _factory()
+        _streamlit_caches[kind] = cached
+    return cached
+
+
+def cached_dataset(key, factory):
+    """Return the dataset stored under ``key``, loading it with ``factory()``."""
+    st = _streamlit()
+    if st is not None:
+        return _streamlit_cache(st, "dataset")(key, factory)
+    return _datasets.get_or_create(key, factory)
+
+
+def cached_state(key, factory):
+    """Return the solver state stored under ``key``, creating it with ``factory()``."""
+    st = _streamlit()
+    if st is not None:
+        return _streamlit_cache(st, "resource")(key, factory)
+    return _states.get_or_create(key, factory)
+
+
+def cached_result(key, compute):
+    """Return the solved result stored under ``key``, computing it with ``compute()``.
+
+    The caller receives its own copy, so it may modify the result freely.
+    """
+    st = _streamlit()
+    if st is not None:
+        # st.cache_data hands out a fresh copy on every hit.
+        return _streamlit_cache(st, "data")(key, compute)
+    return _results.get_or_create(key, compute).copy()
+
+
+def clear_results():
+    """Drop every cached result, keeping the solver states and their compiled problems."""
+    _results.clear()
+    if "data" in _streamlit_caches:
+        _streamlit_caches["data"].clear()
+
+
+def clear():
+    """Drop every cached dataset, solver state and result."""
+    _datasets.clear()
+    _states.clear()
+    _results.clear()
+    for cached in _streamlit_caches.values():
+        cached.clear()
@@ -0,0 +1,56 @@
+"""Frontiers with a cash allocation, built on the capital allocation line.
+
+With a budget range ``0 <= sum(w) <= 1``, zero lower bounds and nothing else,
+the uninvested budget earns the risk-free rate. Every efficient portfolio up to
+the tangency portfolio ``w_T`` then mixes cash with ``w_T``, i.e. it is
+``alpha * w_T`` with ``alpha`` fixed by the target return. Beyond ``w_T`` the
+budget is fully invested and the frontier is the risky frontier. The whole cash
+frontier thus follows from one maximum Sharpe ratio solve and the risky
+frontier that is usually cached already, instead of a QP solve per point.
+"""
+import copy
+
+import numpy as np
+
+from portfolio_engine import frontier, sharpe, targets
+from portfolio_engine.constraints import bounds_and_budget_only
+
+
+def applies(p):
+    """Return whether ``p`` allocates between cash and long positions under a budget only."""
+    return (
+        p.LowerBudget == 0
+        and p.UpperBudget == 1
+        and p.LowerBound is not None
+        and not np.any(p.LowerBound)
+        and p.UpperBound is None
+        and bounds_and_budget_only(p)
+    )
+
+
+def risky(p):
+    """Return a copy of ``p`` fully invested in the risky assets, sharing its solver state."""
+    q = copy.copy(p)
+    q.LowerBudget = q.UpperBudget = 1.0
+    return q
+
+
+def estimate_frontier(p, num_points):
+    """Return ``num_points`` efficient portfolios from all-cash to maximum return."""
+    base = risky(p)
+    try:
+        tangency = sharpe.estimate_max_sharpe(base)
+    except ValueError:
+        # No tangency above the risk-free rate: no capital allocation line.
+        return frontier.estimate_frontier(p, num_points)
+    tangent_return = tangency @ p.AssetMean
+    top = frontier.frontier_limit(base, "max")
+    returns = np.linspace(p.RiskFreeRate, max(top @ p.AssetMean, tangent_return), num_points)
+
+    weights = np.empty((num_points, p.NumAssets))
+    line = returns <= tangent_return
+    alpha = (returns[line] - p.RiskFreeRate) / (tangent_return - p.RiskFreeRate)
+    weights[line] = alpha[:, None] * tangency
+    if not line.all():
+        weights[~line] = targets.estimate_by_return(base, returns[~line])
+    return weights
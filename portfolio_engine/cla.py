@@ -0,0 +1,218 @@
+"""Critical line algorithm for budget- and bound-constrained frontiers.
+
+When the only constraints are a budget equality and asset bounds, the efficient
+portfolios solve
+
+    minimize  w' S w / 2 - lam * m' w   subject to  sum(w) = b,  lb <= w <= ub
+
+for a risk tolerance ``lam`` running from infinity (maximum return) down to zero
+(minimum variance), and the optimal weights are piecewise linear in ``lam``.
+Markowitz's critical line algorithm walks ``lam`` downwards and records every
+corner portfolio, i.e. every point where an asset enters or leaves its bounds.
+Between two adjacent corners the weights and the expected return are both
+linear in ``lam``, so every frontier portfolio is an exact interpolation of two
+corners and no further optimization is needed.
+"""
+import numpy as np
+
+from portfolio_engine import timing
+from portfolio_engine.constraints import bounds_and_budget_only
+
+# Largest factor-model universe traced by critical lines, which need the dense
+# covariance; larger ones go to the sparse QP.
+MAX_FACTORED_ASSETS = 1000
+
+
+def applies(p):
+    """Return whether the constraints of ``p`` are a budget equality plus bounds only."""
+    return (
+        (not p._state.factored or p.NumAssets <= MAX_FACTORED_ASSETS)
+        and p.LowerBudget is not None
+        and p.LowerBudget == p.UpperBudget
+        and p.LowerBound is not None
+        and np.all(np.isfinite(p.LowerBound))
+        and bounds_and_budget_only(p)
+    )
+
+
+class _FreeBlock:
+    """Inverse of the covariance block of the free assets, updated one asset at a time.
+
+    Alongside ``A = inv(S[F, F])`` it keeps ``K = A @ S[F, :]`` and the Schur
+    complements ``s[j] = S[j, j] - S[j, F] @ K[:, j]``, which is everything the
+    line search needs. Adding or removing an asset is a rank-one update costing
+    O(n * |F|) instead of a fresh O(|F|^3) factorization; the block is rebuilt
+    from scratch periodically to keep rounding errors from accumulating.
+    """
+
+    REFRESH = 64
+
+    def __init__(self, covar, F):
+        self.covar = covar
+        self.reset(F)
+
+    def reset(self, F):
+        self.F = list(F)
+        self.updates = 0
+        rows = self.covar[self.F]
+        self.A = np.linalg.inv(rows[:, self.F])
+        self.K = self.A @ rows
+        self.s = np.diag(self.covar) - np.einsum("ij,ij->j", rows, self.K)
+
+    def add(self, i):
+        g, s_i = self.K[:, i], self.s[i]
+        r = (self.covar[i] - self.covar[i, self.F] @ self.K) / s_i
+        self.A = np.block([
+            [self.A + np.outer(g, g) / s_i, -g[:, None] / s_i],
+            [-g[None, :] / s_i, np.array([[1.0 / s_i]])],
+        ])
+        self.K = np.vstack([self.K - np.outer(g, r), r])
+        self.s = self.s - s_i * r ** 2
+        self.F.append(i)
+        self._count()
+
+    def remove(self, i):
+        k = self.F.index(i)
+        a, row = self.A[:, k], self.K[k]
+        keep = np.arange(len(self.F)) != k
+        self.A = (self.A - np.outer(a, a) / a[k])[np.ix_(keep, keep)]
+        self.K = (self.K - np.outer(a, row) / a[k])[keep]
+        self.s = self.s + row ** 2 / a[k]
+        del self.F[k]
+        self._count()
+
+    def _count(self):
+        self.updates += 1
+        if self.updates >= self.REFRESH:
+            self.reset(self.F)
+
+
+def _line(mean, covar, w, block, budget):
+    """Return the critical line through the current corner.
+
+    The free weights move along ``alpha + lam * beta``. ``alpha_i + lam * beta_i``
+    is the weight bounded asset ``i`` would take if it were freed as well.
+    """
+    F = np.array(block.F)
+    B = np.setdiff1d(np.arange(len(mean)), F)
+    A, K_B = block.A, block.K[:, B]
+    wB = w[B]
+    u, v, z = A.sum(axis=1), A @ mean[F], K_B @ wB
+    c1, c3 = u.sum(), v.sum()
+    alpha = u * (budget - wB.sum() + z.sum()) / c1 - z
+    beta = v - u * c3 / c1
+
+    # Freeing bounded asset i borders the free block with one row and column;
+    # its weight on the enlarged line follows from the Schur complement s[i].
+    uG, vG, zG = K_B.sum(axis=0), mean[F] @ K_B, covar[np.ix_(B, F)] @ z
+    s = block.s[B]
+    h = covar[np.ix_(B, B)] @ wB
+    u_i = (1 - uG) / s
+    v_i = (mean[B] - vG) / s
+    z_i = (h - zG) / s - wB
+    c1_i = c1 + u_i * (1 - uG)
+    c3_i = c3 + v_i * (1 - uG)
+    zsum_i = z.sum() - wB * uG + z_i * (1 - uG)
+    alpha_i = u_i * (budget - (wB.sum() - wB) + zsum_i) / c1_i - z_i
+    beta_i = v_i - u_i * c3_i / c1_i
+    return F, B, alpha, beta, alpha_i, beta_i
+
+
+def max_return(mean, lower, upper, budget, tol=1e-10):
+    """Return the maximum-return portfolio and the index of its free asset.
+
+    Starting from the lower bounds, the highest-mean assets are raised to their
+    upper bounds until the budget is spent; the asset that absorbs the
+    remainder is the free one. This solves the maximum-return LP exactly.
+    """
+    upper = np.full(len(mean), np.inf) if upper is None else upper
+    w = lower.astype(float)
+    room = budget - w.sum()
+    if room < -tol:
+        raise ValueError("Lower bounds exceed the budget; the portfolio set is empty.")
+    for i in np.argsort(-mean, kind="stable"):
+        w[i] = min(upper[i], lower[i] + room)
+        room -= w[i] - lower[i]
+        if room <= tol:
+            break
+    if room > tol:
+        raise ValueError("Upper bounds cannot meet the budget; the portfolio set is empty.")
+    return w, i
+
+
+def critical_line(mean, covar, lower, upper, budget, tol=1e-10):
+    """Return the corner portfolios (one per row) from maximum return down to minimum variance."""
+    n = len(mean)
+    upper = np.full(n, np.inf) if upper is None else upper
+    w, i = max_return(mean, lower, upper, budget, tol)
+    block = _FreeBlock(covar, [i])
+
+    corners = [w.copy()]
+    lam = np.inf
+    for _ in range(10 * n + 10):
+        F, B, alpha, beta, alpha_i, beta_i = _line(mean, covar, w, block, budget)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # a) a free asset reaches the bound it is moving towards
+            bound = np.where(beta > 0, lower[F], upper[F])
+            lam_in = np.where(np.abs(beta) > tol, (bound - alpha) / beta, -np.inf)
+            # b) a bounded asset leaves its bound, moving into the interior
+            at_upper = w[B] >= upper[B] - tol
+            inward = np.where(at_upper, beta_i > tol, beta_i < -tol)
+            lam_out = np.where(inward, (w[B] - alpha_i) / beta_i, -np.inf)
+        # A free asset sitting on a bound and moving outwards is bound at once
+        # (a zero-length step); a bounded asset is only freed further down.
+        lam_in[~np.isfinite(lam_in) | (lam_in > lam + tol * max(1.0, abs(lam)))] = -np.inf
+        lam_out[~np.isfinite(lam_out) | (lam_out >= lam - tol)] = -np.inf
+
+        k_in = int(np.argmax(lam_in)) if len(F) else None
+        k_out = int(np.argmax(lam_out)) if len(B) else None
+        best_in = lam_in[k_in] if k_in is not None else -np.inf
+        best_out = lam_out[k_out] if k_out is not None else -np.inf
+        lam = min(max(best_in, best_out), lam)
+        if lam <= 0:
+            w[F] = alpha
+            corners.append(w.copy())
+            break
+        w[F] = alpha + lam * beta
+        if best_in >= best_out:
+            w[F[k_in]] = bound[k_in]
+            block.remove(F[k_in])
+        else:
+            block.add(B[k_out])
+        corners.append(w.copy())
+    return np.array(corners)
+
+
+def corner_portfolios(p):
+    """Return the corner portfolios of ``p``, computed once per set of constraint values."""
+    key = ("cla", p._constraint_key())
+    corners = p._state.solutions.get(key)
+    if corners is None:
+        covariance = p._state.covariance
+        with timing.stage("critical line"):
+            corners = critical_line(p.AssetMean, covariance, p.LowerBound, p.UpperBound, p.LowerBudget)
+        p._state.solutions[key] = corners
+    return corners
+
+
+def interpolate(corners, mean, targets):
+    """Return the frontier portfolios with expected returns ``targets`` by exact interpolation."""
+    # Corners run from maximum return to minimum variance; flip to ascending return.
+    corners = corners[::-1]
+    returns = np.maximum.accumulate(corners @ mean)
+    targets = np.atleast_1d(targets)
+    if len(corners) == 1:
+        return np.repeat(corners, len(targets), axis=0)
+    k = np.clip(np.searchsorted(returns, targets, side="right") - 1, 0, len(corners) - 2)
+    span = returns[k + 1] - returns[k]
+    t = np.divide(targets - returns[k], span, out=np.zeros_like(span), where=span > 0)
+    t = np.clip(t, 0.0, 1.0)
+    return corners[k] + t[:, None] * (corners[k + 1] - corners[k])
+
+
+def estimate_frontier(p, num_points):
+    """Return ``num_points`` efficient portfolios evenly spaced in return, ascending."""
+    corners = corner_portfolios(p)
+    returns = corners @ p.AssetMean
+    targets = np.linspace(returns[-1], returns[0], num_points)
+    return interpolate(corners, p.AssetMean, targets)
@@ -0,0 +1,165 @@
+"""Headless runner: frontiers, maximum Sharpe ratio portfolios and limits to disk.
+
+Usage::
+
+    python -m portfolio_engine MOMENTS [MOMENTS ...] [--spec SPEC.json ...]
+                               [--out DIR] [--num-ports N]
+
+``MOMENTS`` is a MATLAB ``.mat`` moments file or a directory in the format of
+:mod:`portfolio_engine.store`; a stored return panel is turned into moments
+with :func:`portfolio_engine.moments.estimate_moments`. Each ``SPEC.json``
+holds one constraint set, or a list of them, keyed by ``Portfolio`` setter
+names without the ``set`` prefix and applied in order after the default
+constraints (long only, fully invested)::
+
+    {"name": "turnover", "InitPort": "equal", "Turnover": 0.2}
+    {"name": "costs", "InitPort": "equal", "Costs": [0.002, 0.002]}
+    {"name": "tracking", "InitPort": "equal",
+     "TrackingError": [0.0144, {"indices": [14, 15, 19]}]}
+    {"name": "long-short", "DefaultConstraints": false,
+     "Bounds": [-1, 1], "Budget": [0, 0], "OnewayTurnover": [1, 1]}
+
+Values are passed as by :func:`portfolio_engine.batch.configure`: a scalar as
+the only argument and a list as the positional arguments, so a per-asset
+vector is written as ``[[...]]``. A portfolio argument may also be
+``"equal"``, ``"zero"`` or ``{"indices": [...]}`` (equal weights on those
+assets). ``RiskFreeRate`` overrides the dataset's ``CashMean``. Without
+``--spec`` the default constraints alone are run.
+
+For every moments file and constraint set, ``DIR/<moments>/<spec>/`` receives
+``frontier.csv``, ``limits.csv`` and ``max_sharpe.csv`` (risk, return and one
+weight column per asset), and ``DIR/summary.json`` lists every run with its
+timing or its error. The same records are printed to stdout as JSON lines,
+one per run; anything else written to stdout while solving, such as solver
+diagnostics printed from C, goes to stderr instead. The exit status is 1 if
+any run failed.
+
+Only NumPy and the engine's solvers are imported: no Streamlit, no Plotly.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from portfolio_engine import matfile, moments, store
+from portfolio_engine.batch import configure
+from portfolio_engine.portfolio import Portfolio
+
+
+def load_moments(path):
+    """Return ``(AssetList, AssetMean, AssetCovar, CashMean)`` from a moments file or store directory."""
+    if os.path.isdir(path):
+        dataset = store.open_dataset(path)
+    else:
+        dataset = matfile.load_moments(path)
+    if dataset.kind == "returns":
+        AssetMean, AssetCovar = moments.estimate_moments(dataset.AssetReturns).moments()
+    else:
+        AssetMean, AssetCovar = dataset.AssetMean, dataset.AssetCovar
+    return dataset.AssetList, AssetMean, AssetCovar, dataset.scalars.get("CashMean", 0.0)
+
+
+def load_specs(paths):
+    """Return the constraint sets in the JSON files ``paths``, named by file and position."""
+    if not paths:
+        return [{"name": "default"}]
+    specs = []
+    for path in paths:
+        with open(path) as f:
+            loaded = json.load(f)
+        loaded = loaded if isinstance(loaded, list) else [loaded]
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for k, spec in enumerate(loaded):
+            spec.setdefault("name", stem if len(loaded) == 1 else f"{stem}-{k + 1}")
+            specs.append(spec)
+    return specs
+
+
+def build_portfolio(AssetList, AssetMean, AssetCovar, CashMean, spec):
+    """Return a ``Portfolio`` with the moments and the constraint set ``spec``."""
+    p = Portfolio(AssetList, CashMean)
+    p.setAssetMoments(AssetMean, AssetCovar)
+    if spec.get("DefaultConstraints", True):
+        p.setDefaultConstraints()
+    return configure(p, {name: value for name, value in spec.items() if name != "DefaultConstraints"})
+
+
+def write_portfolios(path, p, weights):
+    """Write one row per portfolio: risk, return and the weights."""
+    weights = np.atleast_2d(weights)
+    risks, returns = p.estimatePortMoments(weights)
+    header = ",".join(["Risk", "Return"] + [str(asset).replace(",", " ") for asset in p.AssetList])
+    np.savetxt(
+        path, np.column_stack([risks, returns, weights]), fmt="%.10g", delimiter=",", header=header, comments=""
+    )
+
+
+def run(p, directory, num_ports):
+    """Solve the frontier, limits and maximum Sharpe ratio portfolio of ``p`` into ``directory``."""
+    os.makedirs(directory, exist_ok=True)
+    result = {}
+    for output, solve in (
+        ("frontier", lambda: p.estimateFrontier(num_ports)),
+        ("limits", p.estimateFrontierLimits),
+        ("max_sharpe", p.estimateMaxSharpeRatio),
+    ):
+        start = time.perf_counter()
+        try:
+            write_portfolios(os.path.join(directory, f"{output}.csv"), p, solve())
+            result[output] = {"seconds": round(time.perf_counter() - start, 6)}
+        except (ValueError, RuntimeError) as error:
+            result[output] = {"error": str(error)}
+    return result
+
+
+@contextlib.contextmanager
+def records_stream():
+    """Yield a text stream on stdout while file descriptor 1 is redirected to stderr."""
+    sys.stdout.flush()
+    stdout = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        with os.fdopen(os.dup(stdout), "w") as records:
+            yield records
+    finally:
+        sys.stdout.flush()
+        os.dup2(stdout, 1)
+        os.close(stdout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m portfolio_engine", description=__doc__.split("\n")[0])
+    parser.add_argument("moments", nargs="+", help=".mat moments file or portfolio_engine.store directory")
+    parser.add_argument("--spec", action="append", default=[], help="JSON constraint set(s); repeatable")
+    parser.add_argument("--out", default="frontiers", help="output directory (default: %(default)s)")
+    parser.add_argument("--num-ports", type=int, default=20, help="frontier portfolios (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    specs = load_specs(args.spec)
+    summary = []
+    with records_stream() as records:
+        for path in args.moments:
+            name = os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+            AssetList, AssetMean, AssetCovar, CashMean = load_moments(path)
+            for spec in specs:
+                entry = {"moments": path, "spec": spec["name"]}
+                try:
+                    p = build_portfolio(AssetList, AssetMean, AssetCovar, CashMean, spec)
+                    entry.update(run(p, os.path.join(args.out, name, spec["name"]), args.num_ports))
+                except (ValueError, TypeError) as error:
+                    entry["error"] = str(error)
+                summary.append(entry)
+                print(json.dumps(entry), file=records, flush=True)
+
+    os.makedirs(args.out, exist_ok=True)
+    with open(os.path.join(args.out, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=1)
+    failed = any(
+        "error" in entry or any("error" in result for result in entry.values() if isinstance(result, dict))
+        for entry in summary
+    )
+    return 1 if failed else 0
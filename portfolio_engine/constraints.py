@@ -0,0 +1,237 @@
+"""Portfolio constraints as cvxpy expressions with parameterized values.
+
+A constraint set is split into its *structure* -- which constraints are present,
+which fixes the shape of the compiled problem -- and its *values*, which are
+:class:`cvxpy.Parameter` objects refreshed from a ``Portfolio`` before each
+solve. Problems are compiled once per structure and re-solved for new values.
+
+Trades relative to ``InitPort`` are modelled with separate non-negative buy and
+sell variables, ``w - InitPort = buy - sell``, and positions with separate long
+and short variables, ``w = long - short``. Transaction costs, turnover, one-way
+turnover and gross exposure are then linear in these parts and no absolute
+values are needed, so every constraint stays sparse and linear in the number of
+assets.
+
+Risk is the squared norm of the exposures ``R.T @ w`` to a square-root factor
+``R`` of the covariance: the cached Cholesky factor of a dense covariance, or
+for a factor model its loadings and specific risks, which keeps the problem
+O(nk). The exposures of a dense covariance are variables tied to the weights
+by ``R.T @ w``, which first-order solvers converge on faster than on the
+quadratic form itself. A tracking-error limit shares them: it is the
+second-order cone ``||R.T @ w - R.T @ TrackingPort|| <= TrackingError`` on the
+exposures. The benchmark exposures are a parameter, so a new benchmark only
+changes values.
+"""
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from portfolio_engine.lazy import lazy_import
+
+cp = lazy_import("cvxpy")
+
+
+class Structure(NamedTuple):
+    """Which constraints are present; one compiled problem per distinct value."""
+
+    has_lower: bool
+    has_upper: bool
+    budget: Optional[str]  # None, "fixed" or "range"
+    has_costs: bool
+    has_turnover: bool
+    has_buy_turnover: bool
+    has_sell_turnover: bool
+    has_gross: bool
+    has_tracking: bool
+
+    @property
+    def has_trades(self):
+        return self.has_costs or self.has_turnover or self.has_buy_turnover or self.has_sell_turnover
+
+    @property
+    def has_sum_limits(self):
+        """Whether a limit applies to a sum of buy/sell or long/short parts."""
+        return self.has_turnover or self.has_buy_turnover or self.has_sell_turnover or self.has_gross
+
+
+def bounds_and_budget_only(p):
+    """Return whether ``p`` has no constraints besides bounds and budget."""
+    return all(
+        value is None
+        for value in (
+            p.BuyCost, p.SellCost, p.Turnover, p.BuyTurnover, p.SellTurnover, p.GrossExposure,
+            p.TrackingError,
+        )
+    )
+
+
+def structure(p):
+    """Return the constraint :class:`Structure` of ``p``: the part that changes the compiled problem."""
+    if p.LowerBudget is None and p.UpperBudget is None:
+        budget = None
+    elif p.LowerBudget == p.UpperBudget:
+        budget = "fixed"
+    else:
+        budget = "range"
+    return Structure(
+        has_lower=p.LowerBound is not None,
+        has_upper=p.UpperBound is not None,
+        budget=budget,
+        has_costs=p.BuyCost is not None,
+        has_turnover=p.Turnover is not None,
+        has_buy_turnover=p.BuyTurnover is not None,
+        has_sell_turnover=p.SellTurnover is not None,
+        has_gross=p.GrossExposure is not None,
+        has_tracking=p.TrackingError is not None,
+    )
+
+
+def turnover(p, weights):
+    """Return the average turnover ``sum(|w - InitPort|) / 2`` of each row of ``weights``."""
+    trades = weights - (0.0 if p.InitPort is None else p.InitPort)
+    return 0.5 * np.abs(trades).sum(axis=-1)
+
+
+def tracking_port(p):
+    """Return the benchmark for the tracking error: ``TrackingPort``, else ``InitPort``, else cash."""
+    if p.TrackingPort is not None:
+        return p.TrackingPort
+    return np.zeros(p.NumAssets) if p.InitPort is None else p.InitPort
+
+
+def net_returns(p, weights):
+    """Return the expected return of each row of ``weights`` net of transaction costs.
+
+    Under a budget range the part of the budget left uninvested is held in cash
+    at ``RiskFreeRate``, as in the MATLAB ``Portfolio`` object.
+    """
+    returns = weights @ p.AssetMean
+    if p.LowerBudget != p.UpperBudget:
+        returns = returns + p.RiskFreeRate * (1 - weights.sum(axis=-1))
+    if p.BuyCost is None:
+        return returns
+    trades = weights - (0.0 if p.InitPort is None else p.InitPort)
+    return returns - np.maximum(trades, 0.0) @ p.BuyCost - np.maximum(-trades, 0.0) @ p.SellCost
+
+
+class ConstraintSet:
+    """Parameters and constraint expressions for one constraint structure."""
+
+    def __init__(self, state, structure):
+        NumAssets = len(state.AssetMean)
+        self.state = state
+        self.factor = factor = state.factor
+        self.structure = structure
+        self.lower = cp.Parameter(NumAssets)
+        self.upper = cp.Parameter(NumAssets)
+        self.lower_budget = cp.Parameter()
+        self.upper_budget = cp.Parameter()
+        self.init = cp.Parameter(NumAssets)
+        self.buy_cost = cp.Parameter(NumAssets, nonneg=True)
+        self.sell_cost = cp.Parameter(NumAssets, nonneg=True)
+        self.risk_free = cp.Parameter()
+        self.turnover = cp.Parameter(nonneg=True)
+        self.buy_turnover = cp.Parameter(nonneg=True)
+        self.sell_turnover = cp.Parameter(nonneg=True)
+        self.gross = cp.Parameter(nonneg=True)
+        self.tracking_error = cp.Parameter(nonneg=True)
+        self.tracking_exposure = cp.Parameter(factor.shape[1])
+        if structure.has_trades:
+            self.buy = cp.Variable(NumAssets, nonneg=True)
+            self.sell = cp.Variable(NumAssets, nonneg=True)
+        if structure.has_gross:
+            self.long = cp.Variable(NumAssets, nonneg=True)
+            self.short = cp.Variable(NumAssets, nonneg=True)
+        # Exposures to the covariance factor, R.T @ w: the risk of a dense
+        # covariance, and the tracking error of any covariance.
+        self.has_exposure = structure.has_tracking or not state.factored
+        if self.has_exposure:
+            self.exposure = cp.Variable(factor.shape[1])
+
+    def build(self, w, scale=1.0):
+        """Return the constraints on weights ``w``.
+
+        ``scale`` multiplies every right-hand side. Passing a non-negative
+        variable gives the homogenized (perspective) form of the constraint set
+        used by the maximum Sharpe ratio problem.
+        """
+        s = self.structure
+        constraints = []
+        if s.has_lower:
+            constraints.append(w >= self.lower * scale)
+        if s.has_upper:
+            constraints.append(w <= self.upper * scale)
+        if s.budget == "fixed":
+            constraints.append(cp.sum(w) == self.lower_budget * scale)
+        elif s.budget == "range":
+            constraints += [
+                cp.sum(w) >= self.lower_budget * scale,
+                cp.sum(w) <= self.upper_budget * scale,
+            ]
+        if s.has_trades:
+            constraints.append(w - self.buy + self.sell == self.init * scale)
+        if s.has_turnover:
+            constraints.append(cp.sum(self.buy) + cp.sum(self.sell) <= 2 * self.turnover * scale)
+        if s.has_buy_turnover:
+            constraints.append(cp.sum(self.buy) <= self.buy_turnover * scale)
+        if s.has_sell_turnover:
+            constraints.append(cp.sum(self.sell) <= self.sell_turnover * scale)
+        if s.has_gross:
+            constraints += [
+                w == self.long - self.short,
+                cp.sum(self.long) + cp.sum(self.short) <= self.gross * scale,
+            ]
+        if self.has_exposure:
+            constraints.append(self.exposure == self.factor.T @ w)
+        if s.has_tracking:
+            constraints.append(
+                cp.norm(self.exposure - self.tracking_exposure * scale) <= self.tracking_error * scale
+            )
+        return constraints
+
+    def risk(self, w):
+        """Return the variance expression of ``w`` (call after :meth:`build`)."""
+        if self.has_exposure:
+            return cp.sum_squares(self.exposure)
+        # Systematic plus specific risk: O(nk) terms, no n x n matrix.
+        systematic = cp.sum_squares(self.state.loadings.T @ w)
+        return systematic + cp.sum(cp.multiply(self.state.SpecificVar, cp.square(w)))
+
+    def costs(self):
+        """Return the transaction cost expression (zero without costs)."""
+        if not self.structure.has_costs:
+            return 0.0
+        return self.buy_cost @ self.buy + self.sell_cost @ self.sell
+
+    def cash_return(self, w):
+        """Return the risk-free return on the uninvested budget (zero for a fixed budget)."""
+        if self.structure.budget != "range":
+            return 0.0
+        return self.risk_free * (1 - cp.sum(w))
+
+    def load(self, p):
+        """Copy the constraint values of ``p`` into the parameters."""
+        if p.LowerBound is not None:
+            self.lower.value = p.LowerBound
+        if p.UpperBound is not None:
+            self.upper.value = p.UpperBound
+        if p.LowerBudget is not None:
+            self.lower_budget.value = p.LowerBudget
+            self.upper_budget.value = p.UpperBudget
+        self.risk_free.value = p.RiskFreeRate
+        if self.structure.has_trades:
+            self.init.value = np.zeros(p.NumAssets) if p.InitPort is None else p.InitPort
+        if p.BuyCost is not None:
+            self.buy_cost.value = p.BuyCost
+            self.sell_cost.value = p.SellCost
+        if p.Turnover is not None:
+            self.turnover.value = p.Turnover
+        if p.BuyTurnover is not None:
+            self.buy_turnover.value = p.BuyTurnover
+        if p.SellTurnover is not None:
+            self.sell_turnover.value = p.SellTurnover
+        if p.GrossExposure is not None:
+            self.gross.value = p.GrossExposure
+        if p.TrackingError is not None:
+            self.tracking_error.value = p.TrackingError
+            self.tracking_exposure.value = self.factor.T @ tracking_port(p)
@@ -0,0 +1,203 @@
+"""Parametric quadratic-programming solver for the efficient frontier.
+
+Every constraint structure (see :mod:`portfolio_engine.constraints`) is compiled
+into cvxpy problems once and stored on the shared
+:class:`~portfolio_engine.state.SolverState`. The constraint values and the
+target return are :class:`cvxpy.Parameter` objects, so tracing a frontier
+only updates parameter values and re-solves: OSQP keeps its KKT factorization
+and cvxpy warm-starts each point from the previous point's optimal solution.
+
+Risk enters every problem as the squared norm of the exposures ``R.T @ w`` to
+the covariance factor (see :mod:`portfolio_engine.constraints`), on which OSQP
+converges in fewer iterations than on the quadratic form of the covariance.
+OSQP solves to tolerances of 1e-6 and polishes the solution. Limits on sums of
+buy/sell or long/short parts (turnover, gross exposure) add up the residuals of
+one equality per asset, so those problems are solved to 1e-7, which makes the
+limits hold to solver precision. Targets are solved from the highest return
+down: the top of the frontier, where only a few assets are held, converges
+slowest, and every lower point is then warm-started from a close neighbour.
+The iteration caps leave room for the top points; only a point OSQP does not
+solve within them is re-solved with the interior-point solver. Targets under a
+tracking-error cone are traced the same way with the first-order cone solver
+SCS, at 1e-8 since its residuals are less tight than OSQP's polished ones.
+"""
+import time
+import warnings
+
+import numpy as np
+
+from portfolio_engine import cla, timing
+from portfolio_engine.constraints import ConstraintSet, bounds_and_budget_only, net_returns, structure
+from portfolio_engine.lazy import lazy_import
+
+cp = lazy_import("cvxpy")
+
+# cvxpy solver names (the values of cp.OSQP and cp.CLARABEL), spelled out so
+# that importing this module does not import cvxpy.
+QP_SOLVER = "OSQP"
+LP_SOLVER = "CLARABEL"
+CONE_SOLVER = "SCS"
+FALLBACK_SOLVER = "CLARABEL"
+CONE_OPTIONS = {"max_iters": 20000, "eps_abs": 1e-8, "eps_rel": 1e-8}
+SOLVER_OPTIONS = {
+    "OSQP": {"max_iter": 10000, "eps_abs": 1e-6, "eps_rel": 1e-6, "polish": True},
+    "SCS": CONE_OPTIONS,
+}
+# Options for constraint structures with limits on sums (Structure.has_sum_limits).
+TIGHT_SOLVER_OPTIONS = {
+    "OSQP": {"max_iter": 20000, "eps_abs": 1e-7, "eps_rel": 1e-7, "polish": True},
+    "SCS": CONE_OPTIONS,
+}
+
+
+def _timed_solve(problem, **options):
+    """Solve ``problem``, timing cvxpy's compilation and the solver as separate stages."""
+    start = time.perf_counter()
+    try:
+        problem.solve(**options)
+    finally:
+        elapsed = time.perf_counter() - start
+        compiled = problem.compilation_time or 0.0
+        timing.add("compile", compiled)
+        timing.add("solve", elapsed - compiled)
+
+
+def solve(problem, solver=QP_SOLVER, options=SOLVER_OPTIONS, warm_start=True):
+    """Solve ``problem``, falling back to the interior-point solver if needed.
+
+    ``options`` maps solver names to their settings. Unless ``warm_start`` is
+    false the solver starts from the problem's previous solution. Returns the
+    name of the solver that found the solution.
+    """
+    with warnings.catch_warnings():
+        # An inaccurate first-order solution is replaced by the fallback below.
+        warnings.simplefilter("ignore", UserWarning)
+        try:
+            _timed_solve(problem, solver=solver, warm_start=warm_start, **options.get(solver, {}))
+        except cp.SolverError:
+            pass
+    if problem.status != cp.OPTIMAL and solver != FALLBACK_SOLVER:
+        solver = FALLBACK_SOLVER
+        _timed_solve(problem, solver=solver)
+    if problem.status not in (cp.OPTIMAL, cp.OPTIMAL_INACCURATE):
+        raise RuntimeError(f"Portfolio optimization failed with status '{problem.status}'.")
+    return solver
+
+
+class FrontierProblem:
+    """Minimum-risk, maximum-return and target-return problems for one constraint structure."""
+
+    def __init__(self, state, structure):
+        AssetMean = state.AssetMean
+        self.constraints = ConstraintSet(state, structure)
+        self.weights = w = cp.Variable(len(AssetMean))
+        self.target = cp.Parameter()
+        # Tracking-error cones need the interior-point solver throughout, and
+        # factor models converge in a few interior-point iterations where OSQP
+        # would hit its iteration cap on the large universes they are used for.
+        self.solver = FALLBACK_SOLVER if structure.has_tracking or state.factored else QP_SOLVER
+        # A sequence of targets under a tracking-error cone is warm-started in
+        # the first-order cone solver, which converges in a few hundred cheap
+        # iterations from a neighbouring point.
+        self.target_solver = CONE_SOLVER if structure.has_tracking and not state.factored else self.solver
+        self.options = TIGHT_SOLVER_OPTIONS if structure.has_sum_limits else SOLVER_OPTIONS
+
+        constraints = self.constraints.build(w)
+        ret = AssetMean @ w + self.constraints.cash_return(w) - self.constraints.costs()
+        risk = self.constraints.risk(w)
+        self.min_risk = cp.Problem(cp.Minimize(risk), constraints)
+        self.max_return = cp.Problem(cp.Maximize(ret), constraints)
+        self.target_return = cp.Problem(cp.Minimize(risk), constraints + [ret >= self.target])
+
+    def solve(self, problem, solver=None):
+        """Solve ``problem`` and return a copy of the optimal weights."""
+        solve(problem, solver or self.solver, self.options)
+        return np.array(self.weights.value)
+
+    def solve_targets(self, returns):
+        """Return the minimum-risk portfolios for the ascending target ``returns``, one per row."""
+        weights = np.empty((len(returns), self.weights.size))
+        # Highest target first, so each point is warm-started from the one above
+        # it. The highest starts cold: the last solution (the previous lowest
+        # target) is a worse start than none.
+        for row in reversed(range(len(returns))):
+            self.target.value = returns[row]
+            solve(self.target_return, self.target_solver, self.options, warm_start=row < len(returns) - 1)
+            weights[row] = self.weights.value
+        return weights
+
+
+def frontier_problem(p):
+    """Return the compiled :class:`FrontierProblem` for ``p``, loaded with its constraint values.
+
+    Hold ``p._state.lock`` from this call until the solutions are read back.
+    """
+    key = ("frontier", structure(p))
+    problem = p._state.problems.get(key)
+    if problem is None:
+        with timing.stage("build"):
+            problem = p._state.problems[key] = FrontierProblem(p._state, key[1])
+    problem.constraints.load(p)
+    return problem
+
+
+def _min_risk(p):
+    if (
+        p.LowerBound is None
+        and p.UpperBound is None
+        and p.LowerBudget is not None
+        and p.LowerBudget == p.UpperBudget
+        and bounds_and_budget_only(p)
+    ):
+        # Budget only: the minimum variance portfolio is b * inv(S) 1 / (1' inv(S) 1).
+        y = p._state.solve(np.ones(p.NumAssets))
+        return p.LowerBudget * y / y.sum()
+    if cla.applies(p):
+        # The last corner of the critical line is the exact minimum variance portfolio.
+        return cla.corner_portfolios(p)[-1].copy()
+    with p._state.lock:
+        problem = frontier_problem(p)
+        solve(problem.min_risk, problem.solver, TIGHT_SOLVER_OPTIONS)
+        return np.array(problem.weights.value)
+
+
+def _max_return(p):
+    if cla.applies(p):
+        return cla.max_return(p.AssetMean, p.LowerBound, p.UpperBound, p.LowerBudget)[0]
+    with p._state.lock:
+        problem = frontier_problem(p)
+        return problem.solve(problem.max_return, LP_SOLVER)
+
+
+def frontier_limit(p, choice):
+    """Return the minimum-risk (``"min"``) or maximum-return (``"max"``) portfolio of ``p``.
+
+    Each limit is one targeted solve (closed form, critical line or greedy
+    where the constraints allow), done once per set of constraint values.
+    """
+    key = ("limit", choice, p._constraint_key())
+    weights = p._state.solutions.get(key)
+    if weights is None:
+        weights = p._state.solutions[key] = _min_risk(p) if choice == "min" else _max_return(p)
+    return weights.copy()
+
+
+def frontier_limits(p):
+    """Return the minimum-risk and maximum-return portfolios of ``p`` as two rows."""
+    return np.vstack([frontier_limit(p, "min"), frontier_limit(p, "max")])
+
+
+def estimate_frontier(p, num_points):
+    """Return ``num_points`` efficient portfolios (one per row) evenly spaced in return."""
+    limits = frontier_limits(p)
+    low, high = limits
+    targets = np.linspace(*net_returns(p, limits), num_points)
+
+    weights = np.empty((num_points, p.NumAssets))
+    weights[0] = low
+    if num_points > 2:
+        with p._state.lock:
+            weights[1:-1] = frontier_problem(p).solve_targets(targets[1:-1])
+    if num_points > 1:
+        weights[-1] = high
+    return weights
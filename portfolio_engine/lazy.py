@@ -0,0 +1,37 @@
+"""Deferred imports of heavy optional dependencies.
+
+``cvxpy`` alone takes over a second to import, and many uses of the engine --
+closed-form Sharpe ratios, frontiers traced by critical lines, cached results
+-- never build an optimization problem. Modules bind such dependencies with
+:func:`lazy_import`, which returns a module object that is only executed on
+first attribute access, so the cost is paid by the first solve rather than by
+``import portfolio_engine``.
+
+The first access imports the module with :func:`importlib.import_module`, whose
+per-module import lock makes other threads wait for the import to finish.
+(``importlib.util.LazyLoader`` exposes the half-executed module to them before
+Python 3.12.)
+"""
+import importlib
+import importlib.util
+import sys
+import types
+
+
+class _LazyModule(types.ModuleType):
+    """Placeholder that imports the named module on first attribute access."""
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name):
+    """Return module ``name``, executed on first attribute access (at once if already imported)."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    return _LazyModule(name)
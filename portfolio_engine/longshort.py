@@ -0,0 +1,90 @@
+"""Dollar-neutral long/short portfolios.
+
+With a zero budget, a zero ``InitPort`` and no benchmark, every constraint --
+bounds, turnover, one-way turnover, gross exposure and tracking error -- has a
+right-hand side proportional to its limit. Scaling all limits by ``s`` scales
+the feasible set, and with it every frontier portfolio, by ``s``. The frontier
+is therefore solved once for limits normalized to a largest value of one and
+rescaled for any exposure, so changing the exposure of a long/short book needs
+no solve at all.
+
+The Sharpe ratio is scale invariant, so under these constraints the maximum
+Sharpe ratio fixes only the direction of the portfolio. It is returned at the
+largest scale the limits allow, i.e. using the full exposure.
+"""
+import copy
+
+import numpy as np
+
+from portfolio_engine import sharpe
+from portfolio_engine.constraints import tracking_port
+
+# Limits scaled together, as attribute names of ``Portfolio``.
+LIMITS = ("LowerBound", "UpperBound", "Turnover", "BuyTurnover", "SellTurnover", "GrossExposure", "TrackingError")
+
+
+def applies(p):
+    """Return whether the constraints of ``p`` are dollar-neutral and scale with their limits."""
+    return (
+        p.LowerBudget == 0
+        and p.UpperBudget == 0
+        and (p.InitPort is None or not np.any(p.InitPort))
+        and (p.TrackingError is None or not np.any(tracking_port(p)))
+        and any(getattr(p, name) is not None for name in LIMITS)
+    )
+
+
+def normalized(p):
+    """Return ``(scale, unit)``: the largest limit of ``p`` and a copy with limits divided by it."""
+    values = [np.abs(getattr(p, name)) for name in LIMITS if getattr(p, name) is not None]
+    finite = [np.max(v[np.isfinite(v)], initial=0.0) for v in values]
+    scale = max(finite)
+    unit = copy.copy(p)
+    if scale > 0:
+        for name in LIMITS:
+            if getattr(p, name) is not None:
+                setattr(unit, name, getattr(p, name) / scale)
+    return scale, unit
+
+
+def max_scale(p, direction):
+    """Return the largest ``t`` for which ``t * direction`` satisfies the limits of ``p``."""
+    d = direction
+    gross, buys, sells = np.abs(d).sum(), np.maximum(d, 0).sum(), np.maximum(-d, 0).sum()
+    bounds = [np.inf]
+    with np.errstate(divide="ignore"):
+        if p.UpperBound is not None:
+            bounds.append(np.min(np.where(d > 0, p.UpperBound / d, np.inf)))
+        if p.LowerBound is not None:
+            bounds.append(np.min(np.where(d < 0, p.LowerBound / d, np.inf)))
+        if p.Turnover is not None:
+            bounds.append(2 * p.Turnover / gross)
+        if p.BuyTurnover is not None:
+            bounds.append(p.BuyTurnover / buys)
+        if p.SellTurnover is not None:
+            bounds.append(p.SellTurnover / sells)
+        if p.GrossExposure is not None:
+            bounds.append(p.GrossExposure / gross)
+        if p.TrackingError is not None:
+            bounds.append(p.TrackingError / np.linalg.norm(d @ p._state.factor))
+    t = min(bounds)
+    if not np.isfinite(t):
+        raise ValueError("The Sharpe ratio is unbounded under these constraints.")
+    return t
+
+
+def estimate_frontier(p, num_points):
+    """Return the frontier of ``p`` as the rescaled frontier for normalized limits."""
+    scale, unit = normalized(p)
+    if scale == 0:
+        return np.zeros((num_points, p.NumAssets))
+    return scale * unit._frontier(num_points)
+
+
+def estimate_max_sharpe(p):
+    """Return the maximum Sharpe ratio portfolio of ``p`` at full exposure."""
+    scale, unit = normalized(p)
+    if scale == 0:
+        return np.zeros(p.NumAssets)
+    direction = sharpe.estimate_max_sharpe(unit)
+    return scale * max_scale(unit, direction) * direction
@@ -0,0 +1,122 @@
+"""MATLAB ``.mat`` moment files such as ``BlueChipStockMoments.mat``.
+
+:class:`MatFile` reads variables on demand: listing the variables only reads
+their headers, and each variable is parsed the first time it is asked for, so a
+page that needs ``AssetMean`` never parses a large ``AssetCovar``. Version 5
+files (MATLAB's default) are read with :mod:`scipy.io`; version 7.3 files are
+HDF5 and need the optional ``h5py`` package. Both libraries are imported only
+when such a file is opened.
+
+:func:`load_moments` goes one step further and converts the moment variables
+once into the memory-mapped format of :mod:`portfolio_engine.store`, cached on
+disk under a key made of the file's path, size and modification time. Later
+starts open the cached copy and skip ``.mat`` parsing altogether.
+"""
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from portfolio_engine import store
+
+# Directory for converted datasets, overridable with PORTFOLIO_ENGINE_CACHE.
+CACHE_DIR = os.environ.get("PORTFOLIO_ENGINE_CACHE", os.path.join(tempfile.gettempdir(), "portfolio_engine"))
+
+
+class MatFile:
+    """Lazily read variables of a ``.mat`` file by name."""
+
+    def __init__(self, path):
+        from scipy.io.matlab import matfile_version
+
+        self.path = os.fspath(path)
+        self.hdf5 = matfile_version(self.path)[0] == 2
+        self._values = {}
+        if self.hdf5:
+            try:
+                import h5py
+            except ImportError:
+                raise ImportError(f"{self.path} is a MATLAB v7.3 file; reading it needs h5py.") from None
+            with h5py.File(self.path, "r") as f:
+                self.names = [name for name in f if not name.startswith("#")]
+        else:
+            from scipy.io import whosmat
+
+            self.names = [name for name, _, _ in whosmat(self.path)]
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __getitem__(self, name):
+        if name not in self.names:
+            raise KeyError(name)
+        if name not in self._values:
+            self._values[name] = _read_hdf5(self.path, name) if self.hdf5 else _read_v5(self.path, name)
+        return self._values[name]
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+
+def _read_v5(path, name):
+    from scipy.io import loadmat
+
+    # variable_names makes scipy skip over the data of every other variable.
+    return _simplify(loadmat(path, variable_names=[name], squeeze_me=True, chars_as_strings=True)[name])
+
+
+def _read_hdf5(path, name):
+    import h5py
+
+    with h5py.File(path, "r") as f:
+        return _simplify(_hdf5_value(f, f[name]))
+
+
+def _hdf5_value(f, node):
+    # HDF5 stores MATLAB arrays transposed; cells hold references into #refs#.
+    kind = node.attrs.get("MATLAB_class", b"double")
+    kind = kind.decode() if isinstance(kind, bytes) else kind
+    data = node[()]
+    if kind == "cell":
+        return np.array([_hdf5_value(f, f[ref]) for ref in data.T.ravel()], dtype=object)
+    if kind == "char":
+        return "".join(map(chr, np.asarray(data).T.ravel()))
+    return np.asarray(data).T
+
+
+def _simplify(value):
+    """Turn cell arrays of strings into lists and 1 x 1 arrays into floats."""
+    if isinstance(value, np.ndarray) and value.dtype == object:
+        return [_simplify(item) for item in value.ravel()]
+    if isinstance(value, np.ndarray) and value.dtype.kind in "US":
+        return [str(item) for item in value.ravel()]
+    if isinstance(value, np.ndarray) and value.size == 1 and value.dtype.kind in "fiu":
+        return float(value.ravel()[0])
+    if isinstance(value, np.ndarray) and value.ndim == 2 and 1 in value.shape:
+        return value.ravel()
+    return value
+
+
+def load_moments(path, cache_dir=None):
+    """Return the moments in a ``.mat`` file as a memory-mapped stored dataset.
+
+    The file is parsed on the first call only; the converted dataset is cached
+    under ``cache_dir`` (default :data:`CACHE_DIR`) and reused until the file
+    changes. ``AssetList`` defaults to ``Asset 1, Asset 2, ...`` when absent.
+    """
+    path = os.fspath(path)
+    info = os.stat(path)
+    stamp = f"{os.path.abspath(path)}:{info.st_size}:{info.st_mtime_ns}"
+    key = hashlib.sha1(stamp.encode()).hexdigest()
+    name = os.path.splitext(os.path.basename(path))[0]
+    cached = os.path.join(cache_dir or CACHE_DIR, f"{name}-{key[:16]}")
+    if os.path.isfile(os.path.join(cached, store.HEADER)):
+        return store.open_dataset(cached)
+
+    mat = MatFile(path)
+    AssetMean = np.asarray(mat["AssetMean"], dtype=float).ravel()
+    AssetCovar = np.asarray(mat["AssetCovar"], dtype=float)
+    AssetList = mat.get("AssetList") or [f"Asset {i + 1}" for i in range(len(AssetMean))]
+    scalars = {name: mat[name] for name in store.SCALARS if name in mat}
+    return store.save_moments(cached, AssetList, AssetMean, AssetCovar, **scalars)
@@ -0,0 +1,176 @@
+"""Asset moments estimated from return histories, in one pass and online.
+
+A :class:`MomentEstimator` consumes returns (one row per period, one column
+per asset) a chunk at a time and never keeps the history. Each chunk is reduced
+to its own weighted mean and central co-moment matrices, which are merged into
+the running ones with the pairwise update of Chan, Golub and LeVeque (Welford's
+update generalized to batches): shifting both sets of central sums to the
+combined mean costs O(n^2) and involves no large raw sums that cancel. A new day
+of returns is a chunk of one row, so it updates the moments in O(n^2) whatever
+the length of the history.
+
+With a ``HalfLife`` the periods are weighted exponentially: before a chunk of
+``T`` rows is merged, the weight already accumulated decays by
+``0.5 ** (T / HalfLife)``. Without one every period has weight one and the
+estimates equal ``np.mean`` and ``np.cov`` of the full history.
+
+Ledoit-Wolf shrinkage towards a scaled identity needs, besides the covariance,
+the fourth moments ``sum(y_i**2 * y_j**2)`` of the centred returns. They are
+merged the same way from the third moments ``sum(y_i**2 * y_j)``, so shrinkage
+is available online as well, at the price of two more ``n x n`` matrices; it is
+only tracked when requested.
+"""
+import numpy as np
+
+# Rows reduced per chunk when estimating from an array.
+CHUNK_ROWS = 4096
+
+
+class MomentEstimator:
+    """Running weighted mean and covariance of asset returns."""
+
+    def __init__(self, NumAssets, HalfLife=None, Shrinkage=False):
+        self.NumAssets = NumAssets
+        self.HalfLife = HalfLife
+        self.Shrinkage = Shrinkage
+        self.NumPeriods = 0
+        # Total weight, total squared weight and weighted mean of the periods.
+        self.weight = 0.0
+        self.weight_sq = 0.0
+        self.mean = np.zeros(NumAssets)
+        # Weighted central co-moments sum(w * y_i**p * y_j**q) for (p, q) =
+        # (1, 1), (2, 1) and (2, 2), with y the returns less the mean.
+        self.m11 = np.zeros((NumAssets, NumAssets))
+        self.m21 = np.zeros((NumAssets, NumAssets)) if Shrinkage else None
+        self.m22 = np.zeros((NumAssets, NumAssets)) if Shrinkage else None
+
+    def update(self, AssetReturns):
+        """Add one period (a 1-D row) or a chunk of periods (2-D, one row per period)."""
+        chunk = np.atleast_2d(np.asarray(AssetReturns, dtype=float))
+        if chunk.shape[1] != self.NumAssets:
+            raise ValueError(f"Expected returns for {self.NumAssets} assets, got {chunk.shape[1]}.")
+        rows = len(chunk)
+        if rows == 0:
+            return self
+        if self.HalfLife is None:
+            weights = np.ones(rows)
+        else:
+            decay = 0.5 ** (1.0 / self.HalfLife)
+            weights = decay ** np.arange(rows - 1, -1, -1)
+            self._decay(decay ** rows)
+
+        weight = weights.sum()
+        mean = weights @ chunk / weight
+        y = chunk - mean
+        wy = weights[:, None] * y
+        m11 = y.T @ wy
+        if self.Shrinkage:
+            y2 = y * y
+            m21 = y2.T @ wy
+            m22 = y2.T @ (weights[:, None] * y2)
+        else:
+            m21 = m22 = None
+
+        total = self.weight + weight
+        combined = self.mean + (mean - self.mean) * (weight / total)
+        self._shift(self.mean - combined, self.weight, self.m11, self.m21, self.m22)
+        self._shift(mean - combined, weight, m11, m21, m22)
+        self.m11 += m11
+        if self.Shrinkage:
+            self.m21 += m21
+            self.m22 += m22
+        self.mean = combined
+        self.weight = total
+        self.weight_sq += weights @ weights
+        self.NumPeriods += rows
+        return self
+
+    def _decay(self, factor):
+        self.weight *= factor
+        self.weight_sq *= factor * factor
+        self.m11 *= factor
+        if self.Shrinkage:
+            self.m21 *= factor
+            self.m22 *= factor
+
+    @staticmethod
+    def _shift(d, weight, m11, m21, m22):
+        """Re-centre co-moments taken about ``m`` onto ``m - d``, in place."""
+        if weight == 0 or not np.any(d):
+            return
+        dd = np.outer(d, d)
+        if m22 is not None:
+            # sum(w (u + d_i)^2 (v + d_j)^2) with u, v centred.
+            diag = np.diag(m11).copy()
+            m22 += (
+                2 * m21 * d[None, :] + 2 * m21.T * d[:, None]
+                + diag[:, None] * (d * d)[None, :] + (d * d)[:, None] * diag[None, :]
+                + 4 * m11 * dd + weight * dd * dd
+            )
+            # sum(w (u + d_i)^2 (v + d_j)).
+            m21 += diag[:, None] * d[None, :] + 2 * m11 * d[:, None] + weight * (d * d)[:, None] * d[None, :]
+        m11 += weight * dd
+
+    @property
+    def AssetMean(self):
+        """Weighted mean return of each asset."""
+        return self.mean.copy()
+
+    @property
+    def AssetCovar(self):
+        """Weighted sample covariance, unbiased for the effective number of periods."""
+        effective = self.weight - self.weight_sq / self.weight if self.weight else 0.0
+        if effective <= 0:
+            raise ValueError("At least two periods of returns are needed to estimate a covariance.")
+        return self.m11 / effective
+
+    def shrinkage(self):
+        """Return the Ledoit-Wolf intensity of shrinkage towards the scaled identity."""
+        if not self.Shrinkage:
+            raise ValueError("Shrinkage is only available from an estimator created with Shrinkage=True.")
+        S = self.m11 / self.weight
+        target = np.trace(S) / self.NumAssets
+        delta = np.sum(S * S) - 2 * target * np.trace(S) + self.NumAssets * target ** 2
+        if delta <= 0:
+            return 0.0
+        # Sampling variance of S: E||y y' - S||^2 over the effective sample size.
+        effective = self.weight ** 2 / self.weight_sq
+        beta = (self.m22.sum() / self.weight - np.sum(S * S)) / effective
+        return float(np.clip(beta / delta, 0.0, 1.0))
+
+    def moments(self):
+        """Return ``(AssetMean, AssetCovar)``, shrunk towards the scaled identity when tracked."""
+        AssetCovar = self.AssetCovar
+        if self.Shrinkage:
+            S = self.m11 / self.weight
+            intensity = self.shrinkage()
+            AssetCovar = (1 - intensity) * S
+            AssetCovar[np.diag_indices(self.NumAssets)] += intensity * np.trace(S) / self.NumAssets
+        return self.AssetMean, AssetCovar
+
+
+def chunks(AssetReturns, ChunkRows=CHUNK_ROWS):
+    """Yield row blocks of a 2-D array (e.g. a memory map) or pass an iterable of blocks through."""
+    if isinstance(AssetReturns, np.ndarray) or hasattr(AssetReturns, "shape"):
+        for start in range(0, AssetReturns.shape[0], ChunkRows):
+            yield AssetReturns[start:start + ChunkRows]
+    else:
+        yield from AssetReturns
+
+
+def estimate_moments(AssetReturns, HalfLife=None, Shrinkage=False, ChunkRows=CHUNK_ROWS):
+    """Return the :class:`MomentEstimator` of a return history read chunk by chunk.
+
+    ``AssetReturns`` is a 2-D array with one row per period, which is read
+    ``ChunkRows`` rows at a time so a memory-mapped history is never loaded
+    whole, or an iterable of such row blocks.
+    """
+    estimator = None
+    for chunk in chunks(AssetReturns, ChunkRows):
+        chunk = np.atleast_2d(chunk)
+        if estimator is None:
+            estimator = MomentEstimator(chunk.shape[1], HalfLife, Shrinkage)
+        estimator.update(chunk)
+    if estimator is None:
+        raise ValueError("No returns to estimate moments from.")
+    return estimator
@@ -0,0 +1,278 @@
+"""Mean-variance ``Portfolio`` object shared by the application pages.
+
+The class mirrors the MATLAB Financial Toolbox ``Portfolio`` object used in the
+original examples: moments, constraints and the initial portfolio are set with
+``set*`` methods and every page works on the same implementation. Factorizations,
+compiled problems and solved results are held in the shared
+:class:`~portfolio_engine.state.SolverState` for the portfolio's moments.
+"""
+import numpy as np
+
+from portfolio_engine import cache, cash, cla, frontier, longshort, moments, sharpe, targets, timing, turnover
+from portfolio_engine.constraints import bounds_and_budget_only, net_returns
+from portfolio_engine.risk import port_risk
+from portfolio_engine.state import factor_model_state, fingerprint, solver_state
+
+
+class Portfolio:
+    """Mean-variance portfolio optimization problem.
+
+    Attribute names follow the MATLAB ``Portfolio`` object. Bounds, costs and
+    other per-asset quantities are stored as arrays of length ``NumAssets``;
+    unset constraints are ``None``.
+    """
+
+    def __init__(self, AssetList, RiskFreeRate):
+        self.AssetList = AssetList
+        self.RiskFreeRate = RiskFreeRate
+        self.NumAssets = len(AssetList)
+        self.AssetMean = None
+        self.AssetCovar = None
+        self.FactorLoadings = None
+        self.FactorCovar = None
+        self.SpecificVar = None
+        self.InitPort = None
+        self.LowerBound = None
+        self.UpperBound = None
+        self.LowerBudget = None
+        self.UpperBudget = None
+        self.BuyCost = None
+        self.SellCost = None
+        self.Turnover = None
+        self.BuyTurnover = None
+        self.SellTurnover = None
+        self.GrossExposure = None
+        self.TrackingError = None
+        self.TrackingPort = None
+        self._state = None
+
+    def _asset_vector(self, value):
+        """Broadcast a scalar or per-asset value to a float array (``None`` passes through)."""
+        if value is None:
+            return None
+        return np.broadcast_to(np.asarray(value, dtype=float), (self.NumAssets,)).copy()
+
+    def _constraint_key(self):
+        """Fingerprint of every constraint value, for caching solved results."""
+        # InitPort only matters to trade and tracking-error constraints.
+        init = None if bounds_and_budget_only(self) else self.InitPort
+        # RiskFreeRate only matters to a budget range, where uninvested cash earns it.
+        cash_rate = None if self.LowerBudget == self.UpperBudget else self.RiskFreeRate
+        return fingerprint(
+            init, cash_rate, self.LowerBound, self.UpperBound, self.LowerBudget, self.UpperBudget,
+            self.BuyCost, self.SellCost, self.Turnover, self.BuyTurnover, self.SellTurnover,
+            self.GrossExposure, self.TrackingError, self.TrackingPort,
+        )
+
+    @timing.timed
+    def setAssetMoments(self, AssetMean, AssetCovar=None, FactorLoadings=None, FactorCovar=None, SpecificVar=None):
+        """Set the asset mean and either a dense covariance or a factor model.
+
+        A factor model ``FactorLoadings @ FactorCovar @ FactorLoadings.T +
+        diag(SpecificVar)`` (``n x k``, ``k x k`` and ``n``, all three required) is
+        kept in factored form and ``AssetCovar`` stays ``None``, so risk and
+        optimization cost O(nk) rather than O(n^2). A dense covariance that is not positive
+        definite is repaired once per set of moments (see
+        :mod:`portfolio_engine.psd`), with a warning.
+        """
+        self.AssetMean = np.asarray(AssetMean, dtype=float)
+        factor_model = (FactorLoadings, FactorCovar, SpecificVar)
+        if any(value is None for value in factor_model) and any(value is not None for value in factor_model):
+            raise ValueError("A factor model needs all of FactorLoadings, FactorCovar and SpecificVar.")
+        if FactorLoadings is None:
+            self.AssetCovar = np.asarray(AssetCovar, dtype=float)
+            self.FactorLoadings = self.FactorCovar = self.SpecificVar = None
+            self._state = solver_state(self.AssetMean, self.AssetCovar)
+            # Factorize now: an invalid covariance is repaired (with a warning)
+            # here, once per set of moments, rather than inside a solve.
+            self._state.validate()
+            return
+        FactorLoadings = np.asarray(FactorLoadings, dtype=float)
+        FactorCovar = np.asarray(FactorCovar, dtype=float)
+        NumFactors = FactorCovar.shape[0] if FactorCovar.ndim == 2 else -1
+        if FactorCovar.shape != (NumFactors, NumFactors) or FactorLoadings.shape != (self.NumAssets, NumFactors):
+            raise ValueError(
+                f"FactorLoadings must be NumAssets x k and FactorCovar k x k with NumAssets = {self.NumAssets}; "
+                f"got {FactorLoadings.shape} and {FactorCovar.shape}."
+            )
+        self.AssetCovar = None
+        self.FactorLoadings = FactorLoadings
+        self.FactorCovar = FactorCovar
+        self.SpecificVar = self._asset_vector(SpecificVar)
+        self._state = factor_model_state(self.AssetMean, self.FactorLoadings, self.FactorCovar, self.SpecificVar)
+
+    @timing.timed
+    def estimateAssetMoments(self, AssetReturns, HalfLife=None, Shrinkage=False):
+        """Estimate and set the asset moments from returns, one row per period.
+
+        The history is read in chunks (see :mod:`portfolio_engine.moments`),
+        optionally weighted with an exponential ``HalfLife`` in periods and
+        shrunk with Ledoit-Wolf. Returns the estimator: after
+        ``estimator.update(returns)`` for a new period,
+        ``setAssetMoments(*estimator.moments())`` refreshes the moments without
+        rescanning the history.
+        """
+        estimator = moments.estimate_moments(AssetReturns, HalfLife, Shrinkage)
+        self.setAssetMoments(*estimator.moments())
+        return estimator
+
+    def setInitPort(self, InitPort):
+        self.InitPort = self._asset_vector(InitPort)
+
+    def setDefaultConstraints(self):
+        # Long-only, fully invested
+        self.LowerBound = np.zeros(self.NumAssets)
+        self.UpperBound = None
+        self.LowerBudget = 1.0
+        self.UpperBudget = 1.0
+
+    def setBounds(self, LowerBound, UpperBound=None):
+        self.LowerBound = self._asset_vector(LowerBound)
+        self.UpperBound = self._asset_vector(UpperBound)
+
+    def setBudget(self, LowerBudget, UpperBudget):
+        self.LowerBudget = float(LowerBudget)
+        self.UpperBudget = float(UpperBudget)
+
+    def setCosts(self, BuyCost, SellCost=None):
+        self.BuyCost = self._asset_vector(BuyCost)
+        self.SellCost = self._asset_vector(BuyCost if SellCost is None else SellCost)
+
+    def setTurnover(self, Turnover):
+        self.Turnover = float(Turnover)
+
+    def setOnewayTurnover(self, BuyTurnover, SellTurnover=None):
+        self.BuyTurnover = None if BuyTurnover is None else float(BuyTurnover)
+        self.SellTurnover = None if SellTurnover is None else float(SellTurnover)
+
+    def setGrossExposure(self, GrossExposure):
+        # Limit on sum(|w|), the long plus the short side of the portfolio
+        self.GrossExposure = None if GrossExposure is None else float(GrossExposure)
+
+    def setTrackingError(self, TrackingError, TrackingPort=None):
+        self.TrackingError = float(TrackingError)
+        if TrackingPort is not None:
+            self.TrackingPort = self._asset_vector(TrackingPort)
+
+    @timing.timed
+    def estimateFrontier(self, NumPorts=10):
+        """Return ``NumPorts`` efficient portfolios, one per row, evenly spaced in return.
+
+        Budget-and-bounds problems are traced exactly by the critical line
+        algorithm and cash allocations along the capital allocation line. Any
+        other constraint set is solved as a parametric QP, with turnover-limited
+        frontiers screened against the unlimited one first and dollar-neutral
+        frontiers solved once for unit limits and rescaled. The result is cached
+        per moments, constraint values and ``NumPorts``.
+        """
+        if longshort.applies(self):
+            return longshort.estimate_frontier(self, NumPorts)
+        return self._frontier(NumPorts)
+
+    def _frontier(self, NumPorts):
+        key = ("frontier", self._state.key, self._constraint_key(), NumPorts)
+        if cla.applies(self):
+            return cache.cached_result(key, lambda: cla.estimate_frontier(self, NumPorts))
+        if cash.applies(self):
+            return cache.cached_result(key, lambda: cash.estimate_frontier(self, NumPorts))
+        if self.Turnover is not None:
+            return cache.cached_result(key, lambda: turnover.estimate_frontier(self, NumPorts))
+        return cache.cached_result(key, lambda: frontier.estimate_frontier(self, NumPorts))
+
+    @timing.timed
+    def estimateFrontierByReturn(self, TargetReturn):
+        """Return the efficient portfolio for each target return (one per row).
+
+        A scalar target gives a 1-D weight vector. Targets are looked up on a
+        frontier index cached per constraint set, so changing them needs at
+        most one solve per target.
+        """
+        weights = targets.estimate_by_return(self, TargetReturn)
+        return weights[0] if np.ndim(TargetReturn) == 0 else weights
+
+    @timing.timed
+    def estimateFrontierByRisk(self, TargetRisk):
+        """Return the efficient portfolio for each target risk (one per row).
+
+        A scalar target gives a 1-D weight vector.
+        """
+        weights = targets.estimate_by_risk(self, TargetRisk)
+        return weights[0] if np.ndim(TargetRisk) == 0 else weights
+
+    @timing.timed
+    def estimateFrontierLimits(self, Choice=None):
+        """Return the minimum-risk and maximum-return portfolios, one per row.
+
+        ``Choice`` of ``"min"`` or ``"max"`` returns just that portfolio. The
+        limits are solved once per constraint set and shared with the frontier
+        estimators.
+        """
+        if Choice is None:
+            return frontier.frontier_limits(self)
+        if Choice.lower() in ("min", "max"):
+            return frontier.frontier_limit(self, Choice.lower())
+        raise ValueError(f"Choice must be 'min' or 'max', not {Choice!r}.")
+
+    @timing.timed
+    def estimateMaxSharpeRatio(self):
+        """Return the portfolio with the highest Sharpe ratio relative to ``RiskFreeRate``.
+
+        Solved in closed form when only a budget is set, otherwise as one
+        homogenized QP; never by searching along the frontier. Dollar-neutral
+        portfolios are returned at the full exposure the limits allow.
+        """
+        if longshort.applies(self):
+            return longshort.estimate_max_sharpe(self)
+        return sharpe.estimate_max_sharpe(self)
+
+    @timing.timed
+    def estimatePortMoments(self, PortWeights):
+        """Return ``(risk, return)`` of one portfolio or of a block of portfolios.
+
+        A 1-D ``PortWeights`` gives scalars; a 2-D array with one portfolio per
+        row gives arrays. All risks come from a single product with the cached
+        covariance factor. With transaction costs set, returns are net of the
+        costs of trading from ``InitPort``.
+        """
+        weights = np.asarray(PortWeights, dtype=float)
+        block = np.atleast_2d(weights)
+        risks = port_risk(block, self._state.factor)
+        returns = net_returns(self, block)
+        if weights.ndim == 1:
+            return float(risks[0]), float(returns[0])
+        return risks, returns
+
+
+def estimateAssetMoments(p, AssetReturns, HalfLife=None, Shrinkage=False):
+    """Function form of :meth:`Portfolio.estimateAssetMoments`, as called in MATLAB."""
+    return p.estimateAssetMoments(AssetReturns, HalfLife, Shrinkage)
+
+
+def estimateFrontier(p, NumPorts=10):
+    """Function form of :meth:`Portfolio.estimateFrontier`, as called in MATLAB."""
+    return p.estimateFrontier(NumPorts)
+
+
+def estimateFrontierByReturn(p, TargetReturn):
+    """Function form of :meth:`Portfolio.estimateFrontierByReturn`, as called in MATLAB."""
+    return p.estimateFrontierByReturn(TargetReturn)
+
+
+def estimateFrontierByRisk(p, TargetRisk):
+    """Function form of :meth:`Portfolio.estimateFrontierByRisk`, as called in MATLAB."""
+    return p.estimateFrontierByRisk(TargetRisk)
+
+
+def estimateFrontierLimits(p, Choice=None):
+    """Function form of :meth:`Portfolio.estimateFrontierLimits`, as called in MATLAB."""
+    return p.estimateFrontierLimits(Choice)
+
+
+def estimateMaxSharpeRatio(p):
+    """Function form of :meth:`Portfolio.estimateMaxSharpeRatio`, as called in MATLAB."""
+    return p.estimateMaxSharpeRatio()
+
+
+def estimatePortMoments(p, PortWeights):
+    """Function form of :meth:`Portfolio.estimatePortMoments`, as called in MATLAB."""
+    return p.estimatePortMoments(PortWeights)
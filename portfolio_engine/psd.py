@@ -0,0 +1,108 @@
+"""Validation and repair of covariance matrices that are not positive definite.
+
+Every solver needs a positive definite covariance, but covariances assembled by
+hand (or estimated from incomplete histories) often are not. Validation is an
+attempted Cholesky factorization, which costs a third of an eigendecomposition
+and, when it succeeds, is the factor the solvers need anyway.
+
+A matrix that fails is replaced by a nearby positive definite one with the same
+variances: the correlation matrix is projected onto the nearest correlation
+matrix with Higham's alternating projections (with Dykstra's correction) and
+scaled back by the asset risks, so every asset keeps its own risk. Each
+projection is an eigendecomposition; above :data:`HIGHAM_MAX_ASSETS` assets a
+single eigenvalue clipping followed by a rescaling to unit diagonal is used
+instead. Either way the eigenvalues of the correlation matrix are then raised
+to a floor relative to their average (one), which bounds its condition number:
+a rank-deficient covariance would admit nearly riskless long/short portfolios,
+whose Sharpe ratios are limited only by round-off.
+
+The check and the repair run once per set of moments: the solver state caches
+the factor (see :mod:`portfolio_engine.state`).
+"""
+import numpy as np
+
+# Smallest eigenvalue of a repaired correlation matrix, relative to the average.
+EIGENVALUE_FLOOR = 1e-3
+# Largest condition number accepted for a repaired correlation matrix; with
+# the floor above it is at most NumAssets / EIGENVALUE_FLOOR.
+MAX_CONDITION = 1e8
+# Smallest variance kept, relative to the largest.
+VARIANCE_FLOOR = 1e-10
+# Largest matrix repaired with alternating projections; larger ones are clipped.
+HIGHAM_MAX_ASSETS = 250
+HIGHAM_TOLERANCE = 1e-8
+HIGHAM_MAX_ITER = 100
+
+
+def symmetric(matrix):
+    """Return ``matrix`` itself if it is symmetric, else its symmetric part."""
+    if np.array_equal(matrix, matrix.T):
+        return matrix
+    return 0.5 * (matrix + matrix.T)
+
+
+def cholesky(matrix):
+    """Return the lower Cholesky factor of ``matrix``, or ``None`` if it is not positive definite."""
+    try:
+        return np.linalg.cholesky(matrix)
+    except np.linalg.LinAlgError:
+        return None
+
+
+def clip_eigenvalues(matrix, floor=0.0):
+    """Return the symmetric ``matrix`` with its eigenvalues raised to at least ``floor``."""
+    vals, vecs = np.linalg.eigh(matrix)
+    return (vecs * np.maximum(vals, floor)) @ vecs.T
+
+
+def _unit_diagonal(matrix):
+    scale = 1.0 / np.sqrt(np.diag(matrix))
+    return matrix * np.outer(scale, scale)
+
+
+def nearest_correlation(corr, tol=HIGHAM_TOLERANCE, max_iter=HIGHAM_MAX_ITER):
+    """Return the nearest correlation matrix to ``corr`` in the Frobenius norm (Higham 2002)."""
+    Y = corr.copy()
+    correction = np.zeros_like(corr)
+    for _ in range(max_iter):
+        R = Y - correction
+        X = clip_eigenvalues(R)
+        correction = X - R
+        Y = X.copy()
+        np.fill_diagonal(Y, 1.0)
+        if np.linalg.norm(Y - X) <= tol * np.linalg.norm(Y):
+            break
+    return Y
+
+
+def repair(AssetCovar):
+    """Return a positive definite covariance near ``AssetCovar`` with the same variances."""
+    covar = symmetric(AssetCovar)
+    variances = np.diag(covar)
+    # Assets without a positive variance get the smallest floor variance.
+    variances = np.maximum(variances, VARIANCE_FLOOR * max(variances.max(), VARIANCE_FLOOR))
+    risks = np.sqrt(variances)
+    corr = covar / np.outer(risks, risks)
+    np.fill_diagonal(corr, 1.0)
+    if len(corr) <= HIGHAM_MAX_ASSETS:
+        corr = nearest_correlation(corr)
+    # Eigenvalues of at least the floor, then unit diagonal again.
+    corr = _unit_diagonal(clip_eigenvalues(corr, EIGENVALUE_FLOOR * np.trace(corr) / len(corr)))
+    vals = np.linalg.eigvalsh(corr)
+    if not vals[0] > 0 or vals[-1] / vals[0] > MAX_CONDITION:
+        raise np.linalg.LinAlgError(
+            f"The repaired correlation matrix is ill-conditioned (condition number {vals[-1] / vals[0]:.3g})."
+        )
+    return corr * np.outer(risks, risks)
+
+
+def factorize(AssetCovar):
+    """Return ``(factor, repaired)``: a Cholesky factor of the covariance, repairing it if needed."""
+    covar = symmetric(AssetCovar)
+    factor = cholesky(covar)
+    if factor is not None:
+        return factor, False
+    factor = cholesky(repair(covar))
+    if factor is None:
+        raise np.linalg.LinAlgError("The covariance could not be repaired to a positive definite matrix.")
+    return factor, True
@@ -0,0 +1,107 @@
+"""Maximum Sharpe ratio (tangency) portfolio.
+
+With a fixed budget ``b`` and no other constraints the tangency portfolio has
+the closed form ``w = b * y / sum(y)`` with ``y = inv(S) @ (m - rf)``, evaluated
+with the cached Cholesky factor. Any other constraint set is handled by the
+Cornuejols-Tutuncu homogenization: substituting ``w = y / kappa`` turns the
+ratio into the single convex QP
+
+    minimize  y' S y   subject to  (m - rf)' y = 1,  kappa >= 0,
+              (y, kappa) in the homogenized constraint set,
+
+so the tangency portfolio is found in one solve instead of by searching along
+the frontier.
+"""
+import numpy as np
+
+from portfolio_engine import timing
+from portfolio_engine.constraints import ConstraintSet, bounds_and_budget_only, structure
+from portfolio_engine.frontier import FALLBACK_SOLVER, QP_SOLVER, SOLVER_OPTIONS, TIGHT_SOLVER_OPTIONS, solve
+from portfolio_engine.lazy import lazy_import
+
+cp = lazy_import("cvxpy")
+
+# Smallest homogenizing scale accepted; below it the ratio is unbounded.
+MIN_SCALE = 1e-9
+
+
+def closed_form_applies(p):
+    """Return whether the tangency portfolio of ``p`` has the closed form."""
+    return (
+        p.LowerBound is None
+        and p.UpperBound is None
+        and p.LowerBudget is not None
+        and p.LowerBudget == p.UpperBudget
+        and p.LowerBudget > 0
+        and bounds_and_budget_only(p)
+    )
+
+
+def closed_form(p):
+    """Return the tangency portfolio ``b * inv(S) @ (m - rf)``, normalized to the budget."""
+    y = p._state.solve(p.AssetMean - p.RiskFreeRate)
+    total = y.sum()
+    if total <= 0:
+        raise ValueError(
+            "The risk-free rate is not below the return of the minimum variance "
+            "portfolio; the maximum Sharpe ratio portfolio does not exist."
+        )
+    return p.LowerBudget * y / total
+
+
+class SharpeProblem:
+    """Homogenized maximum Sharpe ratio problem for one constraint structure."""
+
+    def __init__(self, state, structure):
+        AssetMean = state.AssetMean
+        self.constraints = ConstraintSet(state, structure)
+        self.risk_free = cp.Parameter()
+        self.weights = y = cp.Variable(len(AssetMean))
+        self.scale = kappa = cp.Variable(nonneg=True)
+
+        constraints = self.constraints.build(y, kappa)
+        excess = AssetMean @ y - self.risk_free * cp.sum(y) - self.constraints.costs()
+        self.problem = cp.Problem(cp.Minimize(self.constraints.risk(y)), constraints + [excess == 1])
+        self.solver = FALLBACK_SOLVER if structure.has_tracking or state.factored else QP_SOLVER
+        self.options = TIGHT_SOLVER_OPTIONS if structure.has_sum_limits else SOLVER_OPTIONS
+
+    def solve(self):
+        """Solve and return the tangency weights ``y / kappa``."""
+        try:
+            solve(self.problem, self.solver, self.options)
+        except RuntimeError:
+            raise ValueError(
+                "No portfolio satisfying the constraints has a positive excess return."
+            ) from None
+        if self.scale.value is None or self.scale.value < MIN_SCALE:
+            raise ValueError("The Sharpe ratio is unbounded under these constraints.")
+        return np.array(self.weights.value) / self.scale.value
+
+
+def sharpe_problem(p):
+    """Return the compiled :class:`SharpeProblem` for ``p``, loaded with its values.
+
+    Hold ``p._state.lock`` from this call until the solution is read back.
+    """
+    key = ("sharpe", structure(p))
+    problem = p._state.problems.get(key)
+    if problem is None:
+        with timing.stage("build"):
+            problem = p._state.problems[key] = SharpeProblem(p._state, key[1])
+    problem.constraints.load(p)
+    problem.risk_free.value = p.RiskFreeRate
+    return problem
+
+
+def estimate_max_sharpe(p):
+    """Return the maximum Sharpe ratio portfolio of ``p``, solved once per set of values."""
+    key = ("sharpe", p._constraint_key(), p.RiskFreeRate)
+    weights = p._state.solutions.get(key)
+    if weights is None:
+        if closed_form_applies(p):
+            weights = closed_form(p)
+        else:
+            with p._state.lock:
+                weights = sharpe_problem(p).solve()
+        p._state.solutions[key] = weights
+    return weights.copy()
@@ -0,0 +1,173 @@
+"""Numerical state shared by every ``Portfolio`` built from the same moments.
+
+State that depends only on the asset moments -- the covariance factorization,
+the compiled optimization problems together with their solver warm starts, and
+solved results such as corner portfolios -- lives in a :class:`SolverState`.
+States are kept in a bounded cache (see :mod:`portfolio_engine.cache`) keyed on
+a fingerprint of the moments, so every ``Portfolio`` built from the same data
+(on any page, on any rerun) reuses the same state.
+"""
+import hashlib
+import threading
+import warnings
+
+import numpy as np
+
+from portfolio_engine import psd, timing
+from portfolio_engine.cache import MAX_SOLUTION_BYTES, LRUCache, cached_state
+from portfolio_engine.lazy import lazy_import
+
+linalg = lazy_import("scipy.linalg")
+sp = lazy_import("scipy.sparse")
+
+
+def fingerprint(*arrays):
+    """Return a hex digest identifying the shapes and contents of ``arrays`` (``None`` allowed)."""
+    digest = hashlib.sha1()
+    for array in arrays:
+        if array is None:
+            digest.update(b"None")
+            continue
+        array = np.ascontiguousarray(array, dtype=float)
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def covariance_factor(AssetCovar):
+    """Return the lower Cholesky factor ``R`` with ``R @ R.T`` equal to ``AssetCovar``.
+
+    A covariance that is not positive definite is first replaced by the nearby
+    positive definite matrix of :func:`portfolio_engine.psd.repair`.
+    """
+    return psd.factorize(AssetCovar)[0]
+
+
+class SolverState:
+    """Factorizations and compiled problems derived from one set of moments."""
+
+    # Whether the covariance is held as a factor model rather than a dense matrix.
+    factored = False
+
+    def __init__(self, AssetMean, AssetCovar, key=None):
+        self.key = fingerprint(AssetMean, AssetCovar) if key is None else key
+        self.AssetMean = AssetMean
+        self.AssetCovar = AssetCovar
+        # Compiled optimization problems keyed by constraint structure. A problem
+        # keeps its solver workspace between solves, so re-solving it with new
+        # parameter values is warm-started.
+        self.problems = {}
+        # Held from loading a compiled problem's parameters until its solution
+        # is read back: problems, parameters and solver workspaces are shared by
+        # every thread (Streamlit session) using these moments.
+        self.lock = threading.RLock()
+        # Solved results (e.g. corner portfolios) keyed by constraint values.
+        self.solutions = LRUCache(max_bytes=MAX_SOLUTION_BYTES)
+        # Whether AssetCovar had to be repaired; None until it is validated.
+        self.repaired = None
+        self._factor = None
+        self._covariance = None
+
+    @property
+    def factor(self):
+        """Covariance square-root factor, computed (and validated) on first use."""
+        if self._factor is None:
+            with timing.stage("factorize"):
+                self._factor, self.repaired = psd.factorize(self.AssetCovar)
+            if self.repaired:
+                warnings.warn(
+                    "AssetCovar is not positive definite; using the nearest positive definite "
+                    "covariance with the same variances.",
+                    stacklevel=2,
+                )
+        return self._factor
+
+    def validate(self):
+        """Validate the covariance once per state and return whether it was repaired."""
+        self.factor
+        return self.repaired
+
+    @property
+    def covariance(self):
+        """Positive definite covariance used by the solvers: ``AssetCovar``, unless it was repaired."""
+        if self._covariance is None:
+            # Only a repaired covariance is formed anew, from its factor.
+            self._covariance = self.factor @ self.factor.T if self.validate() else psd.symmetric(self.AssetCovar)
+        return self._covariance
+
+    def solve(self, rhs):
+        """Return ``inv(covariance) @ rhs`` from the cached Cholesky factor."""
+        return linalg.cho_solve((self.factor, True), rhs)
+
+
+class FactorModelState(SolverState):
+    """Solver state for a factor-model covariance ``B @ F @ B.T + diag(D)``.
+
+    The square-root factor is the sparse ``n x (k + n)`` matrix
+    ``[B @ chol(F), diag(sqrt(D))]``, so risk evaluation and the QP risk terms
+    cost O(nk) instead of O(n^2). Solves with the covariance use the Woodbury
+    identity and only factorize a ``k x k`` matrix. The dense covariance is
+    never formed unless a caller asks for :attr:`covariance`.
+    """
+
+    factored = True
+
+    def __init__(self, AssetMean, FactorLoadings, FactorCovar, SpecificVar, key=None):
+        if key is None:
+            key = fingerprint(AssetMean, FactorLoadings, FactorCovar, SpecificVar)
+        super().__init__(AssetMean, None, key)
+        self.FactorLoadings = FactorLoadings
+        self.FactorCovar = FactorCovar
+        self.SpecificVar = np.maximum(SpecificVar, 1e-12 * max(SpecificVar.max(), 1e-12))
+        self.repaired = False
+        self._loadings = None
+        self._capacitance = None
+
+    @property
+    def loadings(self):
+        """Loadings on orthonormalized factors, ``B @ chol(F)``, computed on first use."""
+        if self._loadings is None:
+            self._loadings = self.FactorLoadings @ covariance_factor(self.FactorCovar)
+        return self._loadings
+
+    @property
+    def factor(self):
+        """Sparse square-root factor ``[B @ chol(F), diag(sqrt(D))]``, computed on first use."""
+        if self._factor is None:
+            with timing.stage("factorize"):
+                self._factor = sp.hstack(
+                    [sp.csr_array(self.loadings), sp.diags_array(np.sqrt(self.SpecificVar))], format="csr"
+                )
+        return self._factor
+
+    @property
+    def covariance(self):
+        """Dense covariance ``B @ F @ B.T + diag(D)``, formed on first use (O(n^2) memory)."""
+        if self._covariance is None:
+            B = self.FactorLoadings
+            self._covariance = B @ self.FactorCovar @ B.T + np.diag(self.SpecificVar)
+        return self._covariance
+
+    def solve(self, rhs):
+        """Return ``inv(covariance) @ rhs`` by the Woodbury identity in O(nk^2)."""
+        B, Dinv = self.FactorLoadings, 1.0 / self.SpecificVar
+        if self._capacitance is None:
+            # inv(F) + B' inv(D) B, the k x k matrix Woodbury inverts.
+            Finv = linalg.cho_solve((covariance_factor(self.FactorCovar), True), np.eye(len(self.FactorCovar)))
+            self._capacitance = linalg.cho_factor(Finv + (B.T * Dinv) @ B)
+        x = Dinv * rhs
+        return x - Dinv * (B @ linalg.cho_solve(self._capacitance, B.T @ x))
+
+
+def solver_state(AssetMean, AssetCovar):
+    """Return the shared :class:`SolverState` for the given moments."""
+    key = fingerprint(AssetMean, AssetCovar)
+    return cached_state(key, lambda: SolverState(AssetMean, AssetCovar, key))
+
+
+def factor_model_state(AssetMean, FactorLoadings, FactorCovar, SpecificVar):
+    """Return the shared :class:`FactorModelState` for the given factor-model moments."""
+    key = fingerprint(AssetMean, FactorLoadings, FactorCovar, SpecificVar)
+    return cached_state(
+        key, lambda: FactorModelState(AssetMean, FactorLoadings, FactorCovar, SpecificVar, key)
+    )
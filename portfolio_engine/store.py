@@ -0,0 +1,174 @@
+"""On-disk store for return histories and moment snapshots.
+
+A dataset is a directory holding one ``.npy`` file per array and a small
+``header.json`` describing it::
+
+    BlueChipStockMoments/
+        header.json      {"format": ..., "kind": "moments", "AssetList": [...],
+                          "scalars": {"CashMean": ..., ...},
+                          "arrays": {"AssetMean": {"shape": [30], ...}, ...}}
+        AssetMean.npy
+        AssetCovar.npy
+
+Arrays are opened with ``np.load(mmap_mode="r")``: opening a dataset reads the
+header only, and array data is paged in by the operating system as it is
+touched. A 5,000 x 5,000 covariance or a multi-gigabyte return panel therefore
+opens instantly, and every session and process reading the same files shares
+one copy in the page cache. The maps are read-only, so a shared array cannot be
+modified by accident.
+
+Datasets are written to a temporary directory that is renamed into place, so a
+reader never sees a half-written dataset.
+"""
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+FORMAT = "portfolio_engine.store"
+VERSION = 1
+HEADER = "header.json"
+# Scalars of a moments snapshot, as in BlueChipStockMoments.mat.
+SCALARS = ("CashMean", "CashVar", "MarketMean", "MarketVar")
+
+
+class Dataset:
+    """Read-only view of a stored dataset; arrays are memory-mapped on first access."""
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        with open(os.path.join(self.path, HEADER)) as f:
+            self.header = json.load(f)
+        if self.header.get("format") != FORMAT:
+            raise ValueError(f"{self.path} is not a {FORMAT} dataset.")
+        if self.header.get("version", 0) > VERSION:
+            raise ValueError(f"{self.path} was written by a newer version of {FORMAT}.")
+        self.kind = self.header["kind"]
+        self.AssetList = self.header["AssetList"]
+        self.scalars = self.header.get("scalars", {})
+        self._arrays = {}
+
+    def __contains__(self, name):
+        return name in self.header["arrays"] or name in self.scalars
+
+    def __getitem__(self, name):
+        if name in self.scalars:
+            return self.scalars[name]
+        array = self._arrays.get(name)
+        if array is None:
+            if name not in self.header["arrays"]:
+                raise KeyError(name)
+            filename = self.header["arrays"][name]["file"]
+            array = self._arrays[name] = np.load(os.path.join(self.path, filename), mmap_mode="r")
+        return array
+
+    def __getattr__(self, name):
+        # Arrays and scalars by their MATLAB names, e.g. ``dataset.AssetCovar``.
+        if name.startswith("_") or name in ("header", "scalars"):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    @property
+    def names(self):
+        """Names of the stored arrays and scalars."""
+        return list(self.header["arrays"]) + list(self.scalars)
+
+
+def open_dataset(path):
+    """Open the dataset stored at ``path`` without reading any array data."""
+    return Dataset(path)
+
+
+def _write(path, kind, AssetList, arrays, scalars):
+    """Write a dataset directory atomically; ``arrays`` maps names to arrays or chunk iterables."""
+    path = os.fspath(path)
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=parent)
+    try:
+        entries = {}
+        for name, value in arrays.items():
+            filename = f"{name}.npy"
+            array = _write_array(os.path.join(tmp, filename), value)
+            entries[name] = {"file": filename, "shape": list(array.shape), "dtype": array.dtype.str}
+        header = {
+            "format": FORMAT,
+            "version": VERSION,
+            "kind": kind,
+            "AssetList": [str(asset) for asset in AssetList],
+            "scalars": {name: float(value) for name, value in scalars.items()},
+            "arrays": entries,
+        }
+        with open(os.path.join(tmp, HEADER), "w") as f:
+            json.dump(header, f, indent=1)
+        if os.path.isdir(path):
+            # Keep the old dataset readable until the new one is complete.
+            old = tempfile.mkdtemp(prefix=".old-", dir=parent)
+            os.rename(path, os.path.join(old, "dataset"))
+            os.rename(tmp, path)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.rename(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return open_dataset(path)
+
+
+def _write_array(filename, value):
+    """Save an array, or stream an iterable of row blocks into a ``.npy`` file."""
+    if hasattr(value, "shape"):
+        array = np.ascontiguousarray(value)
+        np.save(filename, array)
+        return array
+    # The row count is only known at the end: spool the rows, then prepend the
+    # header. Memory use stays at one block.
+    rows, columns = 0, None
+    with tempfile.TemporaryFile(dir=os.path.dirname(filename)) as spool:
+        for block in value:
+            block = np.atleast_2d(np.asarray(block, dtype=float))
+            if columns is None:
+                columns = block.shape[1]
+            elif block.shape[1] != columns:
+                raise ValueError(f"Row blocks have {block.shape[1]} columns, expected {columns}.")
+            spool.write(np.ascontiguousarray(block).tobytes())
+            rows += len(block)
+        if columns is None:
+            raise ValueError("No rows to store.")
+        spool.seek(0)
+        with open(filename, "wb") as f:
+            header = {"descr": np.dtype(float).str, "fortran_order": False, "shape": (rows, columns)}
+            np.lib.format.write_array_header_1_0(f, header)
+            shutil.copyfileobj(spool, f)
+    return np.load(filename, mmap_mode="r")
+
+
+def save_moments(path, AssetList, AssetMean, AssetCovar, **scalars):
+    """Store a moments snapshot: the asset moments plus cash and market statistics.
+
+    ``scalars`` are the statistics of :data:`SCALARS` (``CashMean=0.03``, ...)
+    or any other named scalars to keep with the snapshot.
+    """
+    arrays = {
+        "AssetMean": np.asarray(AssetMean, dtype=float),
+        "AssetCovar": np.asarray(AssetCovar, dtype=float),
+    }
+    return _write(path, "moments", AssetList, arrays, scalars)
+
+
+def save_returns(path, AssetList, AssetReturns, Dates=None):
+    """Store a return panel, one row per period.
+
+    ``AssetReturns`` is a 2-D array or an iterable of row blocks, which are
+    streamed to disk one at a time. ``Dates`` optionally labels the rows and is
+    stored as ``datetime64[D]``.
+    """
+    arrays = {"AssetReturns": AssetReturns}
+    if Dates is not None:
+        arrays["Dates"] = np.asarray(Dates, dtype="datetime64[D]")
+    return _write(path, "returns", AssetList, arrays, {})
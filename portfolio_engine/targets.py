@@ -0,0 +1,141 @@
+"""Target-return and target-risk lookups on a cached frontier index.
+
+A :class:`FrontierIndex` holds efficient portfolios sorted by return, which on
+the efficient frontier is also the order by risk. A target is located by
+binary search and the bracketing pair is interpolated. Along the segment
+``w_k + t * (w_k+1 - w_k)`` the return is linear and the variance quadratic in
+``t``, so both targets are reached by solving at most a quadratic.
+
+For critical-line problems the index points are the corner portfolios and the
+interpolation is exact. Otherwise the index is a solved frontier. The minimum
+variance is convex in the target return, so the secants of the neighbouring
+segments, extended, bound the frontier from below. An interpolated portfolio
+whose risk is within :data:`RISK_TOLERANCE` of that bound is returned as is;
+only the others are refined with one solve of the compiled target-return
+problem.
+"""
+import warnings
+
+import numpy as np
+
+from portfolio_engine import cla, frontier
+from portfolio_engine.constraints import net_returns
+from portfolio_engine.risk import port_risk
+
+# Frontier points solved to index a constraint set without critical lines.
+INDEX_POINTS = 32
+# Excess risk over the frontier accepted without a solve, relative to the largest frontier risk.
+RISK_TOLERANCE = 1e-3
+
+
+class FrontierIndex:
+    """Efficient portfolios sorted by return and risk, with segment interpolation."""
+
+    def __init__(self, weights, factor, returns, exact):
+        self.weights = weights
+        self.exact = exact
+        self.returns = np.maximum.accumulate(returns)
+        self._factor = factor
+        self.risks = np.maximum.accumulate(np.linalg.norm(weights @ factor, axis=1))
+
+    @property
+    def nbytes(self):
+        return self.weights.nbytes + self.returns.nbytes + self.risks.nbytes
+
+    def _segment(self, values, target):
+        k = np.searchsorted(values, target, side="right") - 1
+        return int(np.clip(k, 0, len(self.weights) - 2))
+
+    def by_return(self, target):
+        """Return the interpolated portfolio with expected return ``target``."""
+        if len(self.weights) == 1:
+            return self.weights[0].copy()
+        k = self._segment(self.returns, target)
+        span = self.returns[k + 1] - self.returns[k]
+        t = 0.0 if span <= 0 else np.clip((target - self.returns[k]) / span, 0.0, 1.0)
+        return self.weights[k] + t * (self.weights[k + 1] - self.weights[k])
+
+    def lower_risk(self, target):
+        """Return a lower bound on the frontier risk at expected return ``target``."""
+        k = self._segment(self.returns, target)
+        returns, variances = self.returns, self.risks ** 2
+        bound = 0.0
+        # The secants of the segments on either side of segment k, extended to the target.
+        for i in (k - 1, k + 1):
+            if 0 <= i < len(returns) - 1 and returns[i + 1] > returns[i]:
+                slope = (variances[i + 1] - variances[i]) / (returns[i + 1] - returns[i])
+                bound = max(bound, variances[i] + slope * (target - returns[i]))
+        return np.sqrt(bound)
+
+    def by_risk(self, target):
+        """Return the interpolated portfolio with risk ``target``."""
+        if len(self.weights) == 1:
+            return self.weights[0].copy()
+        k = self._segment(self.risks, target)
+        start, step = self.weights[k], self.weights[k + 1] - self.weights[k]
+        # Variance along the segment: a t^2 + b t + c, increasing on [0, 1].
+        u, v = start @ self._factor, step @ self._factor
+        a, b, c = v @ v, 2 * (u @ v), u @ u
+        rhs = target ** 2 - c
+        if a > 0:
+            t = (-b + np.sqrt(max(b * b + 4 * a * rhs, 0.0))) / (2 * a)
+        else:
+            t = rhs / b if b > 0 else 0.0
+        return start + np.clip(t, 0.0, 1.0) * step
+
+
+def frontier_index(p):
+    """Return the :class:`FrontierIndex` of ``p``, built once per set of constraint values."""
+    key = ("index", p._constraint_key())
+    index = p._state.solutions.get(key)
+    if index is None:
+        if cla.applies(p):
+            weights, exact = cla.corner_portfolios(p)[::-1], True
+        else:
+            weights, exact = frontier.estimate_frontier(p, INDEX_POINTS), False
+        index = p._state.solutions[key] = FrontierIndex(weights, p._state.factor, net_returns(p, weights), exact)
+    return index
+
+
+def _clip(targets, low, high, name):
+    targets = np.atleast_1d(np.asarray(targets, dtype=float))
+    if np.any((targets < low) | (targets > high)):
+        warnings.warn(
+            f"Target {name} outside the efficient frontier [{low:g}, {high:g}] "
+            "is moved to the nearest frontier limit.",
+            stacklevel=3,
+        )
+    return np.clip(targets, low, high)
+
+
+def _refine(p, index, returns, guesses):
+    if index.exact:
+        return guesses
+    risks = port_risk(guesses, p._state.factor)
+    bounds = np.array([index.lower_risk(target) for target in returns])
+    solve = np.flatnonzero(risks - bounds > RISK_TOLERANCE * index.risks[-1])
+    if len(solve) == 0:
+        return guesses
+    weights = guesses.copy()
+    with p._state.lock:
+        problem = frontier.frontier_problem(p)
+        for row in solve:
+            problem.target.value = returns[row]
+            weights[row] = problem.solve(problem.target_return)
+    return weights
+
+
+def estimate_by_return(p, targets):
+    """Return one efficient portfolio per row for each target return."""
+    index = frontier_index(p)
+    targets = _clip(targets, index.returns[0], index.returns[-1], "return")
+    guesses = np.array([index.by_return(target) for target in targets])
+    return _refine(p, index, targets, guesses)
+
+
+def estimate_by_risk(p, targets):
+    """Return one efficient portfolio per row for each target risk."""
+    index = frontier_index(p)
+    targets = _clip(targets, index.risks[0], index.risks[-1], "risk")
+    guesses = np.array([index.by_risk(target) for target in targets])
+    return _refine(p, index, net_returns(p, guesses), guesses)
@@ -0,0 +1,114 @@
+"""Per-run timers for the hot paths, reported as structured log records.
+
+A *run* -- one rerun of an application page, say -- is opened with
+:func:`run`. While it is open, every timed stage adds its calls and seconds to
+the run: the engine's estimators (:func:`timed`), covariance factorization,
+problem building, cvxpy compilation and solver time, and whatever stages the
+caller marks with :func:`stage` or a :class:`Stopwatch`. Stages may nest, so
+an estimator's time includes the compilation and solves inside it.
+
+When the run closes it is logged as one JSON record on the
+``portfolio_engine.timing`` logger (also attached to the record as its
+``timing`` attribute), so a deployment can collect per-run metrics without a
+profiler. Outside a run the timers cost one context-variable lookup.
+"""
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar("portfolio_engine.timing.run", default=None)
+
+
+class Run:
+    """Calls and seconds per stage of one run, in the order the stages first finished."""
+
+    def __init__(self, name):
+        self.name = name
+        self.stages = {}
+        self.seconds = None
+
+    def add(self, stage, seconds):
+        calls, total = self.stages.get(stage, (0, 0.0))
+        self.stages[stage] = (calls + 1, total + seconds)
+
+    def as_dict(self):
+        return {
+            "run": self.name,
+            "seconds": self.seconds,
+            "stages": {stage: {"calls": calls, "seconds": seconds} for stage, (calls, seconds) in self.stages.items()},
+        }
+
+
+@contextlib.contextmanager
+def run(name):
+    """Record the stages timed inside the block and log them when it exits."""
+    record = Run(name)
+    token = _current.set(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.seconds = time.perf_counter() - start
+        _current.reset(token)
+        fields = record.as_dict()
+        logger.info("%s", json.dumps(fields), extra={"timing": fields})
+
+
+def add(stage, seconds):
+    """Add ``seconds`` measured elsewhere to ``stage`` of the current run, if any."""
+    record = _current.get()
+    if record is not None:
+        record.add(stage, seconds)
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Time the block as stage ``name`` of the current run."""
+    if _current.get() is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(name, time.perf_counter() - start)
+
+
+def timed(function):
+    """Decorator: time each call of ``function`` as a stage named after it."""
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _current.get() is None:
+            return function(*args, **kwargs)
+        with stage(function.__name__):
+            return function(*args, **kwargs)
+
+    return wrapper
+
+
+class Stopwatch:
+    """Times consecutive stages: each :meth:`lap` records the time since the previous one."""
+
+    def __init__(self):
+        self._last = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        add(name, now - self._last)
+        self._last = now
+
+
+def enable_logging(stream=None):
+    """Send the run records to ``stream`` (default stderr), once per process."""
+    if not logger.handlers:
+        handler = logging.StreamHandler(stream or sys.stderr)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
@@ -0,0 +1,51 @@
+"""Turnover-constrained frontiers screened against the unconstrained frontier.
+
+A turnover limit only removes portfolios from the feasible set. A point of the
+frontier without the limit that already trades little enough from ``InitPort``
+is therefore optimal under the limit too and is taken as is. When the frontier
+without the limit is traced by critical lines these points cost nothing, and
+only the points that would trade too much are solved. They use the
+target-return problem compiled once per constraint structure with the limit as
+a parameter, so a new limit value never recompiles anything.
+"""
+import copy
+import warnings
+
+import numpy as np
+
+from portfolio_engine import cla, frontier, targets
+from portfolio_engine.constraints import net_returns, turnover
+
+# Slack allowed when checking the unconstrained points against the limit.
+TOLERANCE = 1e-9
+
+
+def relaxed(p):
+    """Return a shallow copy of ``p`` without the turnover limit, sharing its solver state."""
+    q = copy.copy(p)
+    q.Turnover = None
+    return q
+
+
+def estimate_frontier(p, num_points):
+    """Return ``num_points`` turnover-constrained efficient portfolios evenly spaced in return."""
+    base = relaxed(p)
+    if not cla.applies(base):
+        return frontier.estimate_frontier(p, num_points)
+    limits = frontier.frontier_limits(p)
+    returns = np.linspace(*net_returns(p, limits), num_points)
+    with warnings.catch_warnings():
+        # Targets below the unconstrained minimum-variance return map onto it,
+        # as the target-return problem would.
+        warnings.simplefilter("ignore", UserWarning)
+        weights = targets.estimate_by_return(base, returns)
+
+    weights[0] = limits[0]
+    if num_points > 1:
+        weights[-1] = limits[1]
+    # The limits are already solved under the turnover limit; screen the rest.
+    solve = 1 + np.flatnonzero(turnover(p, weights[1:-1]) > p.Turnover + TOLERANCE)
+    if len(solve):
+        with p._state.lock:
+            weights[solve] = frontier.frontier_problem(p).solve_targets(returns[solve])
+    return weights